@@ -1,4 +1,5 @@
 import json
+import logging
 import random
 import os
 import joblib
@@ -6,6 +7,8 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 
+logger = logging.getLogger(__name__)
+
 
 class ComprehensiveAIMessageGenerator:
     def __init__(self):
@@ -528,7 +531,7 @@ class ComprehensiveAIMessageGenerator:
         if isinstance(user_level, str):
             user_level = int(user_level.replace('Level', ''))
 
-        action_description = PROGRAM_POINT_ACTIONS.get(program_point, f"Executing program line {program_point}")
+        action_description = program_point_actions().get(program_point, f"Executing program line {program_point}")
 
         if user_level == 1:
             return f"Robot is {action_description.lower()}"
@@ -566,4 +569,22 @@ PROGRAM_POINT_ACTIONS = {
     41: "Deactivating vacuum gripper",
     44: "Returning to home position",
     45: "Completing pickup procedure"
-}
\ No newline at end of file
+}
+
+_program_point_actions = None
+
+
+def program_point_actions():
+    """Descriptions generated from the RAPID program, whose line numbers match the controller.
+
+    The program is read on first use; if it is missing or does not parse, PROGRAM_POINT_ACTIONS is used.
+    """
+    global _program_point_actions
+    if _program_point_actions is None:
+        from rapid_program import RapidParseError, load_program
+        try:
+            _program_point_actions = {line: messages["level1"] for line, messages in load_program().actions.items()}
+        except (OSError, RapidParseError) as e:
+            logger.warning("Using built-in program point descriptions: %s", e)
+            _program_point_actions = PROGRAM_POINT_ACTIONS
+    return _program_point_actions
@@ -0,0 +1,156 @@
+"""Compare per-robot CPU and memory of the asyncio connector against thread-per-connection.
+
+Each mode runs in its own child process so the numbers don't bleed into each other:
+
+    python benchmark_connectors.py --url opc.tcp://desktop-j8ae1eh:61510/ABB.IoTGateway --robots 10
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+DEFAULT_URL = "opc.tcp://desktop-j8ae1eh:61510/ABB.IoTGateway"
+DEFAULT_NODE_ID = "ns=3;s=_isac/RAPID/T_ROB1/ProgramPointer"
+
+
+class _CountingHandler:
+    """Subscription handler that only counts notifications"""
+
+    def __init__(self):
+        self.count = 0
+
+    def datachange_notification(self, node, val, data):
+        self.count += 1
+
+    def status_change_notification(self, status):
+        pass
+
+
+def run_threaded(urls, node_id, duration):
+    """One blocking opcua Client (and its threads) per robot, like main.ABBOPCUAConnector"""
+    from opcua import Client
+
+    tracemalloc.start()
+    handler = _CountingHandler()
+    clients = []
+    connect_threads = []
+
+    def _connect(url):
+        client = Client(url)
+        client.connect()
+        client.load_type_definitions()
+        subscription = client.create_subscription(500, handler)
+        subscription.subscribe_data_change(client.get_node(node_id))
+        clients.append(client)
+
+    for url in urls:
+        thread = threading.Thread(target=_connect, args=(url,), daemon=True)
+        thread.start()
+        connect_threads.append(thread)
+    for thread in connect_threads:
+        thread.join()
+
+    return _measure(lambda: time.sleep(duration), lambda: handler.count, len(clients),
+                    lambda: [client.disconnect() for client in clients])
+
+
+def run_async(urls, node_id, duration):
+    """All robots held by one AsyncCellMonitor on a single event loop"""
+    from opcua_async import AsyncCellMonitor
+
+    tracemalloc.start()
+    counter = {'count': 0}
+
+    def _on_data(robot_name, signal_name, value, timestamp):
+        counter['count'] += 1
+
+    async def _main():
+        monitor = AsyncCellMonitor(_on_data)
+        for i, url in enumerate(urls):
+            monitor.add_robot(f"robot{i + 1}", url, {'program_pointer': node_id})
+        started = await monitor.start()
+        connected = sum(1 for ok in started.values() if ok)
+        try:
+            return await _measure_async(duration, lambda: counter['count'], connected)
+        finally:
+            await monitor.stop()
+
+    return asyncio.run(_main())
+
+
+def _measure(wait, get_count, connected, cleanup):
+    """Sample CPU time and thread count over the measurement window"""
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    count_start = get_count()
+    try:
+        wait()
+        return _result(cpu_start, wall_start, get_count() - count_start, connected)
+    finally:
+        cleanup()
+
+
+async def _measure_async(duration, get_count, connected):
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    count_start = get_count()
+    await asyncio.sleep(duration)
+    return _result(cpu_start, wall_start, get_count() - count_start, connected)
+
+
+def _result(cpu_start, wall_start, notifications, connected):
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    # Heap is traced from before the first connect, so it includes session setup
+    current, peak = tracemalloc.get_traced_memory()
+    robots = max(connected, 1)
+    return {
+        'robots': connected,
+        'threads': threading.active_count(),
+        'cpu_percent': 100.0 * cpu / wall,
+        'cpu_ms_per_robot_per_s': 1000.0 * cpu / wall / robots,
+        'heap_kb_per_robot': current / 1024.0 / robots,
+        'heap_peak_kb_per_robot': peak / 1024.0 / robots,
+        'notifications': notifications,
+    }
+
+
+def _run_child(mode, args):
+    command = [sys.executable, __file__, '--child', mode, '--node', args.node,
+               '--duration', str(args.duration)] + [arg for url in args.urls for arg in ('--url', url)]
+    output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', dest='urls', action='append', help="gateway endpoint (repeatable)")
+    parser.add_argument('--robots', type=int, default=1, help="sessions per endpoint")
+    parser.add_argument('--node', default=DEFAULT_NODE_ID, help="node to subscribe on every session")
+    parser.add_argument('--duration', type=float, default=30.0, help="measurement window in seconds")
+    parser.add_argument('--child', choices=['threaded', 'async'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.urls = args.urls or [DEFAULT_URL]
+
+    if args.child:
+        runner = run_threaded if args.child == 'threaded' else run_async
+        print(json.dumps(runner(args.urls, args.node, args.duration)))
+        return
+
+    args.urls = [url for url in args.urls for _ in range(args.robots)]
+    results = {mode: _run_child(mode, args) for mode in ('threaded', 'async')}
+
+    print(f"{'mode':<10}{'robots':>8}{'threads':>9}{'cpu %':>9}{'cpu ms/robot/s':>16}"
+          f"{'heap KB/robot':>15}{'peak KB/robot':>15}{'notifs':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['robots']:>8}{r['threads']:>9}{r['cpu_percent']:>9.2f}"
+              f"{r['cpu_ms_per_robot_per_s']:>16.3f}{r['heap_kb_per_robot']:>15.1f}"
+              f"{r['heap_peak_kb_per_robot']:>15.1f}{r['notifications']:>9}")
+
+
+if __name__ == "__main__":
+    main()
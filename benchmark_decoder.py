@@ -0,0 +1,60 @@
+"""Micro-benchmark of ProgramPointer notification decoding: introspecting slow path vs bound fast path.
+
+    python benchmark_decoder.py --count 100000
+"""
+import argparse
+import time
+
+from program_pointer_decoder import ProgramPointerDecoder
+
+
+class ProgramPointer:
+    """Stand-in for the structure class generated from the ABB type dictionary"""
+
+    def __init__(self, line, module="MainModule", routine="main"):
+        self.Line = line
+        self.Module = module
+        self.Routine = routine
+
+
+class DataValueLike:
+    """Payload wrapped in a Value attribute"""
+
+    def __init__(self, value):
+        self.Value = value
+
+
+PAYLOADS = {
+    'struct': lambda i: ProgramPointer(15 + i % 75),
+    'wrapped': lambda i: DataValueLike(ProgramPointer(15 + i % 75)),
+    'dict': lambda i: {'Line': 15 + i % 75, 'Module': "MainModule", 'Routine': "main"},
+}
+
+
+def measure(decode, values):
+    """Notifications per second for decode over values"""
+    start = time.perf_counter()
+    for value in values:
+        decode(value)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help="notifications per payload layout")
+    args = parser.parse_args()
+
+    print(f"{'payload':<10}{'before (notif/s)':>18}{'after (notif/s)':>18}{'speedup':>10}")
+    for name, make in PAYLOADS.items():
+        values = [make(i) for i in range(args.count)]
+        decoder = ProgramPointerDecoder()
+
+        before = measure(decoder.decode_slow, values)
+        after = measure(decoder.decode, values)
+
+        assert decoder.slow_hits == 1, "fast path should be bound after the first notification"
+        print(f"{name:<10}{before:>18,.0f}{after:>18,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark of the vectorised kinematics against a per-sample Python loop over the same positions.
+
+    python benchmark_kinematics.py --samples 10000 100000 1000000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from kinematics import analyse, DEFAULT_IDLE_SPEED, DEFAULT_MIN_IDLE
+
+
+def synthetic_samples(count, rate=100.0, seed=1):
+    """Pick-and-place like motion at rate Hz: moves between random targets with pauses in between"""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(count) / rate + rng.uniform(0, 0.1 / rate, count)
+    phase = np.arange(count) // int(rate * 2)  # a new segment every two seconds
+    targets = rng.uniform(-500, 500, (phase[-1] + 2, 3))
+    progress = np.clip((np.arange(count) % int(rate * 2)) / rate, 0, 1)  # move for 1 s, then hold
+    smooth = progress * progress * (3 - 2 * progress)
+    positions = targets[phase] + (targets[phase + 1] - targets[phase]) * smooth[:, None]
+    return timestamps, positions
+
+
+def analyse_loop(timestamps, positions, idle_speed=DEFAULT_IDLE_SPEED, min_idle=DEFAULT_MIN_IDLE):
+    """The same quantities sample by sample, as _position_changed style code would compute them"""
+    path_length = 0.0
+    max_speed = max_acceleration = max_jerk = 0.0
+    idle_seconds = 0.0
+    idle_start = None
+    last_velocity = last_acceleration = None
+    last_velocity_time = last_acceleration_time = None
+
+    for i in range(1, len(timestamps)):
+        dt = timestamps[i] - timestamps[i - 1]
+        dx = positions[i][0] - positions[i - 1][0]
+        dy = positions[i][1] - positions[i - 1][1]
+        dz = positions[i][2] - positions[i - 1][2]
+        step = math.sqrt(dx * dx + dy * dy + dz * dz)
+        path_length += step
+        speed = step / dt
+        max_speed = max(max_speed, speed)
+
+        velocity = (dx / dt, dy / dt, dz / dt)
+        velocity_time = (timestamps[i] + timestamps[i - 1]) / 2
+        if last_velocity is not None:
+            span = velocity_time - last_velocity_time
+            acceleration = tuple((v - lv) / span for v, lv in zip(velocity, last_velocity))
+            max_acceleration = max(max_acceleration, math.sqrt(sum(a * a for a in acceleration)))
+            acceleration_time = (velocity_time + last_velocity_time) / 2
+            if last_acceleration is not None:
+                span = acceleration_time - last_acceleration_time
+                jerk = tuple((a - la) / span for a, la in zip(acceleration, last_acceleration))
+                max_jerk = max(max_jerk, math.sqrt(sum(j * j for j in jerk)))
+            last_acceleration, last_acceleration_time = acceleration, acceleration_time
+        last_velocity, last_velocity_time = velocity, velocity_time
+
+        if speed < idle_speed:
+            if idle_start is None:
+                idle_start = timestamps[i - 1]
+        elif idle_start is not None:
+            if timestamps[i - 1] - idle_start >= min_idle:
+                idle_seconds += timestamps[i - 1] - idle_start
+            idle_start = None
+    if idle_start is not None and timestamps[-1] - idle_start >= min_idle:
+        idle_seconds += timestamps[-1] - idle_start
+
+    return {'path_length': path_length, 'max_speed': max_speed, 'max_acceleration': max_acceleration,
+            'max_jerk': max_jerk, 'idle_seconds': idle_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'samples':>10}{'loop ms':>12}{'numpy ms':>12}{'speedup':>10}  results match")
+    for count in args.samples:
+        timestamps, positions = synthetic_samples(count)
+        as_lists = timestamps.tolist(), positions.tolist()  # the loop gets plain Python values
+
+        start = time.perf_counter()
+        expected = analyse_loop(*as_lists)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = analyse(timestamps, positions[:, 0], positions[:, 1], positions[:, 2]).summary()
+        numpy_time = time.perf_counter() - start
+
+        match = all(math.isclose(summary[key], value, rel_tol=1e-6, abs_tol=1e-6) for key, value in expected.items())
+        print(f"{count:>10}{loop_time * 1000:>12.1f}{numpy_time * 1000:>12.1f}{loop_time / numpy_time:>9.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""End-to-end latency and throughput of the monitor pipeline, from ProgramPointer change to display and speech.
+
+Notifications are injected into the real OPCUASubscriptionHandler, MessageQueueManager and
+RobotSimulationWindow message routing at increasing rates; Tk widgets and the TTS engine are
+replaced by instrumented stubs, and a thread stands in for the Tk loop draining UI events. Latency is measured from the scheduled time of each pointer change,
+so a pipeline that falls behind shows it in the numbers.
+
+    python benchmark_pipeline.py --rates 1 10 100 1000 --duration 5 --json results.json
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import main
+from benchmark_decoder import ProgramPointer
+from log_view import BoundedLogView
+from rapid_program import load_program
+
+STAGES = ("handler", "execution_log", "display", "speech_start")
+DEFAULT_RATES = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+MAX_HANDLER_LAG = 0.1  # seconds of p99 handler latency before a rate counts as falling behind
+
+
+class _Widget:
+    """Tk widget stand-in that reports inserted text and ignores everything else"""
+
+    def __init__(self, on_insert=None):
+        self.on_insert = on_insert
+
+    def insert(self, index, text, *tags):
+        if self.on_insert:
+            self.on_insert(text)
+
+    def config(self, **kwargs):
+        pass
+
+    def delete(self, *args):
+        pass
+
+    def see(self, *args):
+        pass
+
+
+class _LineCountingText(_Widget):
+    """Text widget stand-in that tracks only its line count, enough for BoundedLogView's trimming"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = 0
+
+    def insert(self, index, *chunks):
+        self.lines += sum(chunk.count("\n") for chunk in chunks[::2])
+
+    def index(self, index):
+        return f"{self.lines + 1}.0"
+
+    def get(self, start, end):
+        return ""
+
+    def delete(self, start, end=None):
+        self.lines -= int(end.split(".")[0]) - 1
+
+
+class _TimedLogView(BoundedLogView):
+    """The real execution log view, recording when each line reaches the widget"""
+
+    def __init__(self, window):
+        super().__init__(_LineCountingText(), archive_path=os.devnull)
+        self.window = window
+        self.origins = []
+
+    def append(self, message):
+        super().append(message)
+        self.origins.append(self.window.current_origin)
+
+    def flush(self):
+        origins, self.origins = self.origins, []
+        super().flush()
+        for origin in origins:
+            self.window.record("execution_log", origin)
+
+
+class _ImmediateWindow:
+    """Runs window.after callbacks straight away, as an idle Tk loop would"""
+
+    def after(self, delay, callback, *args):
+        callback(*args)
+
+
+class _TimedMessageQueue(main.MessageQueueManager):
+    """The real message queue, remembering which notification each queued message came from"""
+
+    def __init__(self, window, speech):
+        super().__init__(display_callback=window._post_display, speech_callback=speech.speak_text)
+        self.window = window
+        self.origins = {}  # id(QueuedMessage) -> origin; ids reused later are overwritten on creation
+
+    def _make_message(self, text, priority, now, deadline):
+        message = super()._make_message(text, priority, now, deadline)
+        self.origins[id(message)] = self.window.current_origin
+        return message
+
+    def _take_batch(self):
+        batch = super()._take_batch()
+        self.window.pair_origins = [self.origins.pop(id(message), None) for message in batch]
+        return batch
+
+
+class InstrumentedWindow:
+    """The message routing of RobotSimulationWindow on top of stub widgets, timing every stage"""
+
+    log_opcua_message = main.RobotSimulationWindow.log_opcua_message
+    _log_message_now = main.RobotSimulationWindow._log_message_now
+    _process_ui_events = main.RobotSimulationWindow._process_ui_events
+    add_execution_message = main.RobotSimulationWindow.add_execution_message
+    display_messages = main.RobotSimulationWindow.display_messages
+    update_robot_status = main.RobotSimulationWindow.update_robot_status
+    _update_status_display = main.RobotSimulationWindow._update_status_display
+    clean_unicode_chars = main.RobotSimulationWindow.clean_unicode_chars
+    add_ai_message = main.RobotSimulationWindow.add_ai_message
+
+    def __init__(self, user_level, speech):
+        self.user_level = user_level
+        self.user_numeric_level = main.user_level_manager.get_numeric_level(user_level)
+        self.last_line_displayed = None
+        self.window = _ImmediateWindow()
+        self.module_label = self.routine_label = self.line_label = self.queue_status = _Widget()
+        self.execution_log = _TimedLogView(self)
+        self.ai_message_display = _Widget(self._on_display_insert)
+
+        self.ui_events = collections.deque()
+        self.cycle_analytics = main.CycleAnalytics()
+        self.latencies = {stage: [] for stage in STAGES}
+        self.injected_origin = None  # scheduled time of the notification being injected
+        self.current_origin = None  # origin of the UI event being applied on the Tk thread
+        self.pair_origins = []  # origins of the pair just handed to display, for the speech stub
+        self.display_origins = []  # origins of the pair being drawn on the Tk thread
+        self.lock = threading.Lock()
+
+        speech.window = self
+        self.message_queue_manager = _TimedMessageQueue(self, speech)
+
+    def post_ui_event(self, *event):
+        # The trailing origin is ignored by the window's dispatch
+        self.ui_events.append(event + (self.injected_origin,))
+
+    def _post_display(self, messages):
+        self.ui_events.append(("display", list(messages), list(self.pair_origins)))
+
+    def _dispatch_ui_event(self, event):
+        if event[0] == "display":
+            self.display_origins = list(event[-1])
+        else:
+            self.current_origin = event[-1]
+        main.RobotSimulationWindow._dispatch_ui_event(self, event)
+
+    def record(self, stage, origin):
+        if origin is not None:
+            with self.lock:
+                self.latencies[stage].append(time.perf_counter() - origin)
+
+    def _on_display_insert(self, text):
+        self.record("display", self.display_origins.pop(0) if self.display_origins else None)
+
+
+class InstrumentedSpeech:
+    """TTS stand-in: timestamps the start of speech and 'speaks' for as long as the words would take"""
+
+    def __init__(self, words_per_minute):
+        self.words_per_minute = words_per_minute
+        self.window = None
+
+    def speak_text(self, text, callback=None, priority=None):
+        origins, self.window.pair_origins = self.window.pair_origins, []
+        for origin in origins:
+            self.window.record("speech_start", origin)
+
+        parts = [text] if isinstance(text, str) else text
+        words = sum(len(part.split()) for part in parts)
+        duration = words * 60.0 / self.words_per_minute if self.words_per_minute else 0
+        if callback is None:
+            return
+        if duration:
+            threading.Timer(duration, callback).start()
+        else:
+            callback()
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of samples, in milliseconds"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))] * 1000
+
+
+def run_step(rate, duration, user_level, words_per_minute, lines, max_lag=MAX_HANDLER_LAG):
+    """Inject notifications at rate for duration seconds through a fresh pipeline, looping over lines"""
+    speech = InstrumentedSpeech(words_per_minute)
+    window = InstrumentedWindow(user_level, speech)
+    handler = main.OPCUASubscriptionHandler(window)
+    payloads = [ProgramPointer(line) for line in lines]
+
+    stop_tk = threading.Event()
+
+    def _tk_loop():
+        while not stop_tk.wait(main.UI_TICK_MS / 1000.0):
+            window._process_ui_events()
+            window.execution_log.flush()
+            window.cycle_analytics.drain()
+
+    tk_thread = threading.Thread(target=_tk_loop, daemon=True)
+    tk_thread.start()
+
+    period = 1.0 / rate
+    total = max(1, int(rate * duration))
+    backlog = []
+    ui_backlog = []
+    next_sample = 0.0
+    start = time.perf_counter()
+    for i in range(total):
+        due = start + i * period
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        window.injected_origin = due
+        handler.datachange_notification(None, payloads[i % len(payloads)], None)
+        window.record("handler", due)
+
+        elapsed = time.perf_counter() - start
+        if elapsed >= next_sample:
+            backlog.append(window.message_queue_manager.depth())
+            ui_backlog.append(len(window.ui_events))
+            next_sample += duration / 10.0
+    elapsed = time.perf_counter() - start
+    window.injected_origin = None
+    backlog.append(window.message_queue_manager.depth())
+    ui_backlog.append(len(window.ui_events))
+    stop_tk.set()
+    tk_thread.join()
+    # Let this pipeline's display timers run dry instead of working through the backlog
+    queue_stats = window.message_queue_manager.get_stats()
+    window.message_queue_manager.clear()
+    window.ui_events.clear()
+
+    achieved = total / max(elapsed, total * period)
+    half = backlog[len(backlog) // 2]
+    queued = queue_stats.get('queued', 0)
+    displayed = queue_stats.get('displayed', 0)
+    handler_p99 = percentile(window.latencies["handler"], 99)
+    return {
+        'rate': rate,
+        'notifications': total,
+        'achieved_rate': achieved,
+        'handler_sustained': achieved >= 0.95 * rate and handler_p99 <= max_lag * 1000,
+        # The UI event and display backlogs may wobble but must not keep growing. The bounded message
+        # queue must never have filled up or dropped anything, coalescing included: a queue pinned
+        # at its cap and merging duplicates looks flat while most messages are never shown
+        'ui_sustained': ui_backlog[-1] <= ui_backlog[len(ui_backlog) // 2] + main.UI_EVENT_BATCH,
+        'display_sustained': backlog[-1] <= half + 2
+                             and max(backlog) < window.message_queue_manager.max_backlog
+                             and not any(queue_stats.get(key)
+                                         for key in ('coalesced', 'expired', 'evicted', 'rejected')),
+        'displayed_ratio': displayed / queued if queued else None,
+        'backlog': backlog,
+        'ui_backlog': ui_backlog,
+        'message_queue': {key: queue_stats.get(key, 0)
+                          for key in ('queued', 'displayed', 'coalesced', 'expired', 'evicted', 'rejected')},
+        'stages': {stage: {'count': len(samples),
+                           'p50_ms': percentile(samples, 50),
+                           'p99_ms': percentile(samples, 99)}
+                   for stage, samples in window.latencies.items()},
+    }
+
+
+def wait_for_timers():
+    """Join the display and speech timers still running, including the ones they start"""
+    while True:
+        pending = [t for t in threading.enumerate() if isinstance(t, threading.Timer)]
+        if not pending:
+            return
+        for timer in pending:
+            timer.join()
+
+
+def max_sustained(results, key):
+    """Highest rate sustained with every lower rate sustained too"""
+    best = None
+    for r in sorted(results, key=lambda r: r['rate']):
+        if not r[key]:
+            break
+        best = r['rate']
+    return best
+
+
+def print_table(report):
+    header = f"{'rate/s':>8}{'achieved':>10}{'backlog':>9}{'shown':>12}"
+    for stage in STAGES:
+        header += f"{stage + ' p50/p99 ms':>30}"
+    print(header)
+    for r in report['steps']:
+        queue = r['message_queue']
+        row = f"{r['rate']:>8g}{r['achieved_rate']:>10.0f}{r['backlog'][-1]:>9}"
+        row += f"{str(queue['displayed']) + '/' + str(queue['queued']):>12}"
+        for stage in STAGES:
+            s = r['stages'][stage]
+            # The sample count shows how much a percentile rests on; display often has only a few
+            cell = "-" if s['p50_ms'] is None else f"{s['p50_ms']:.2f} / {s['p99_ms']:.2f} n={s['count']}"
+            row += f"{cell:>30}"
+        print(row)
+    print(f"Max sustained rate - handler: {report['max_handler_rate']}/s, "
+          f"Tk loop: {report['max_ui_rate']}/s, display and speech: {report['max_display_rate']}/s")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rates', type=float, nargs='+', default=DEFAULT_RATES, help="notifications/s per step")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per rate step")
+    parser.add_argument('--level', default="Level1", help="operator level the messages are built for")
+    parser.add_argument('--speech-wpm', type=float, default=150,
+                        help="simulated speaking rate, 0 finishes speech instantly")
+    parser.add_argument('--json', help="write results as JSON to this file, '-' for stdout")
+    args = parser.parse_args()
+
+    # The handler narrates from the published tables; the pointer walks every cycle of the same program
+    main.load_message_tables()
+    lines = [line for cycle in load_program().cycles for line in cycle]
+
+    steps = []
+    # Keep any console output from the pipeline out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for rate in sorted(args.rates):
+            result = run_step(rate, args.duration, args.level, args.speech_wpm, lines)
+            steps.append(result)
+            sys.stderr.write(f"{rate:g}/s done\n")
+            if not result['handler_sustained']:
+                break  # higher rates can only fall further behind
+        wait_for_timers()
+
+    report = {
+        'level': args.level,
+        'duration': args.duration,
+        'speech_wpm': args.speech_wpm,
+        'steps': steps,
+        'max_handler_rate': max_sustained(steps, 'handler_sustained'),
+        'max_ui_rate': max_sustained(steps, 'ui_sustained'),
+        'max_display_rate': max_sustained(steps, 'display_sustained'),
+    }
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print_table(report)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,216 @@
+"""Streaming cycle-time and throughput analytics from the program pointer stream.
+
+The subscription handler submits one small tuple per new program line; the Tk loop drains them
+and folds them into running statistics. Every statistic uses constant memory - Welford's running
+mean/variance and P-square quantile estimates - so a whole shift costs the same as one cycle.
+
+Durations tracked:
+    cycle  - cycle start (home move) to cycle end (return move)
+    shape  - cycle durations by the shape picked in that cycle
+    phase  - time the pointer spends inside each movement group, e.g. circle_pickup
+"""
+import collections
+import math
+
+from message_index import CYCLE_START, CYCLE_END
+
+DEFAULT_BACKLOG = 10000  # events held for the drain; the oldest are dropped beyond this
+PICKUP_SUFFIX = "_pickup"
+
+
+class RunningStats:
+    """Count, mean, standard deviation, min and max without keeping samples"""
+
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile from five markers (Jain & Chlamtac's P-square algorithm)"""
+
+    __slots__ = ("q", "heights", "positions", "desired", "increments")
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(1, 5) if value < heights[i]) - 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            # Too few samples for the markers; nearest rank of what there is
+            return self.heights[min(len(self.heights) - 1, int(self.q * len(self.heights)))]
+        return self.heights[2]
+
+
+class DurationStats:
+    """Running stats plus p50/p95 estimates for one kind of duration, in seconds"""
+
+    __slots__ = ("stats", "p50", "p95")
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+
+    def add(self, seconds):
+        self.stats.add(seconds)
+        self.p50.add(seconds)
+        self.p95.add(seconds)
+
+    def summary(self):
+        return {'count': self.stats.count, 'mean': self.stats.mean if self.stats.count else None,
+                'stdev': self.stats.stdev, 'min': self.stats.minimum, 'max': self.stats.maximum,
+                'p50': self.p50.value(), 'p95': self.p95.value()}
+
+
+class CycleAnalytics:
+    """Folds program pointer events into cycle, shape and phase durations.
+
+    submit() runs on the notification thread and only appends to a bounded deque; drain() does
+    the work and belongs to a single consumer, normally the Tk tick.
+    """
+
+    def __init__(self, backlog=DEFAULT_BACKLOG):
+        self.events = collections.deque(maxlen=backlog)
+        self.submitted = 0
+        self.processed = 0
+
+        self.cycles = DurationStats()
+        self.shapes = {}  # shape -> DurationStats of its cycles
+        self.phases = {}  # movement group -> DurationStats of time spent in it
+        self.parts = 0
+        self.first_start = None
+        self.last_end = None
+
+        self.cycle_started = None
+        self.cycle_shape = None
+        self.group = None
+        self.group_started = None
+
+    def submit(self, timestamp, event, group):
+        """Record a new program line: monotonic time, CYCLE_START/CYCLE_END or None, movement group or None"""
+        self.events.append((timestamp, event, group))
+        self.submitted += 1
+
+    @property
+    def dropped(self):
+        return self.submitted - self.processed - len(self.events)
+
+    def drain(self, limit=None):
+        """Process waiting events, oldest first; returns how many were processed"""
+        events = self.events
+        count = 0
+        while events and (limit is None or count < limit):
+            timestamp, event, group = events.popleft()
+            self._process(timestamp, event, group)
+            count += 1
+        self.processed += count
+        return count
+
+    def _process(self, timestamp, event, group):
+        if group != self.group:
+            if self.group is not None:
+                self._stats(self.phases, self.group).add(timestamp - self.group_started)
+            self.group = group
+            self.group_started = timestamp
+            if group is not None and self.cycle_shape is None and group.endswith(PICKUP_SUFFIX):
+                self.cycle_shape = group[:-len(PICKUP_SUFFIX)]
+
+        if event == CYCLE_START:
+            # A cycle that never reached its end (stop, restart) is not counted
+            self.cycle_started = timestamp
+            self.cycle_shape = group[:-len(PICKUP_SUFFIX)] if group and group.endswith(PICKUP_SUFFIX) else None
+            if self.first_start is None:
+                self.first_start = timestamp
+        elif event == CYCLE_END and self.cycle_started is not None:
+            duration = timestamp - self.cycle_started
+            self.cycles.add(duration)
+            self._stats(self.shapes, self.cycle_shape or "unknown").add(duration)
+            self.parts += 1
+            self.last_end = timestamp
+            self.cycle_started = None
+
+    @staticmethod
+    def _stats(table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = DurationStats()
+        return stats
+
+    def parts_per_hour(self):
+        """Completed cycles per hour since the first cycle started"""
+        if not self.parts or self.last_end is None or self.last_end <= self.first_start:
+            return None
+        return self.parts * 3600.0 / (self.last_end - self.first_start)
+
+    def snapshot(self):
+        return {
+            'parts': self.parts,
+            'parts_per_hour': self.parts_per_hour(),
+            'cycle': self.cycles.summary(),
+            'shapes': {shape: stats.summary() for shape, stats in self.shapes.items()},
+            'phases': {phase: stats.summary() for phase, stats in self.phases.items()},
+            'dropped_events': self.dropped,
+        }
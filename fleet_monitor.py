@@ -0,0 +1,142 @@
+"""Supervise the program pointers of many robots and RAPID tasks from one process.
+
+Controllers are listed in a YAML file:
+
+    controllers:
+      - name: cell1
+        url: opc.tcp://desktop-j8ae1eh:61510/ABB.IoTGateway
+        tasks: [T_ROB1]
+      - name: cell2
+        url: opc.tcp://cell2-gateway:61510/ABB.IoTGateway
+        tasks: [T_ROB1, T_ROB2]
+
+    python fleet_monitor.py fleet.yaml
+"""
+import asyncio
+import collections
+import heapq
+import itertools
+import sys
+import time
+
+import yaml
+
+from gateway_nodes import program_pointer_node_id
+from opcua_async import AsyncCellMonitor
+
+OFFSET_SAMPLES = 100  # recent notifications per controller used to estimate its clock offset
+
+ProgramPointerEvent = collections.namedtuple(
+    'ProgramPointerEvent', ['timestamp', 'robot', 'task', 'module', 'routine', 'line'])
+
+
+def load_fleet_config(path):
+    """Read the controller list from a YAML file"""
+    with open(path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    return config.get('controllers', [])
+
+
+def decode_program_pointer(value):
+    """Pull module, routine and line out of a decoded ProgramPointer value"""
+    if isinstance(value, dict):
+        return value.get('Module', "N/A"), value.get('Routine', "N/A"), value.get('Line')
+    return getattr(value, 'Module', "N/A"), getattr(value, 'Routine', "N/A"), getattr(value, 'Line', None)
+
+
+class FleetMonitor:
+    """Pooled connection per controller, merged into one time-ordered program pointer stream"""
+
+    def __init__(self, controllers, message_callback=None, publishing_interval=100, reorder_window=0.5):
+        # One session per controller carries the program pointers of all its tasks
+        self.cell = AsyncCellMonitor(self._on_program_pointer, message_callback, publishing_interval)
+        for controller in controllers:
+            node_ids = {task: program_pointer_node_id(task) for task in controller.get('tasks', ['T_ROB1'])}
+            self.cell.add_robot(controller['name'], controller['url'], node_ids)
+
+        # Notifications from different controllers arrive with different delays and their clocks
+        # disagree. Each source timestamp is moved onto the local clock with that controller's
+        # estimated offset; events are held until they are reorder_window old locally and
+        # released in that corrected order
+        self.reorder_window = reorder_window
+        self.pending = []  # heap of (local time, seq, ProgramPointerEvent)
+        self.sequence = itertools.count()
+        self.offsets = {}  # robot -> recent (source timestamp - local arrival time)
+        self.last_released = 0.0
+        self.late_events = 0
+        self.events = None
+        self.release_task = None
+
+    def _on_program_pointer(self, robot, task, value, timestamp):
+        module, routine, line = decode_program_pointer(value)
+        event = ProgramPointerEvent(timestamp, robot, task, module, routine, line)
+        heapq.heappush(self.pending, (timestamp - self._clock_offset(robot, timestamp), next(self.sequence), event))
+
+    def _clock_offset(self, robot, timestamp):
+        """How far a controller's clock runs ahead of ours, plus its fastest delivery.
+
+        The smallest source-minus-arrival difference among recent notifications is the one that
+        spent least time in transit, so it is the closest estimate of the pure clock offset.
+        """
+        samples = self.offsets.get(robot)
+        if samples is None:
+            samples = self.offsets[robot] = collections.deque(maxlen=OFFSET_SAMPLES)
+        samples.append(timestamp - time.time())
+        return min(samples)
+
+    async def start(self):
+        """Connect to every controller and start merging their streams"""
+        self.events = asyncio.Queue()
+        self.release_task = asyncio.ensure_future(self._release_loop())
+        return await self.cell.start()
+
+    async def stop(self):
+        """Flush buffered events and disconnect"""
+        if self.release_task:
+            self.release_task.cancel()
+            self.release_task = None
+        self._release(float('inf'))
+        await self.cell.stop()
+
+    async def stream(self):
+        """Yield ProgramPointerEvents from all robots and tasks in time order"""
+        while True:
+            yield await self.events.get()
+
+    async def _release_loop(self):
+        while True:
+            await asyncio.sleep(self.reorder_window / 2)
+            self._release(time.time() - self.reorder_window)
+
+    def _release(self, horizon):
+        """Move events older than horizon (local time) from the reorder heap to the output queue"""
+        while self.pending and self.pending[0][0] <= horizon:
+            local_time, _, event = heapq.heappop(self.pending)
+            if local_time < self.last_released:
+                self.late_events += 1  # arrived after the window closed; still delivered
+            else:
+                self.last_released = local_time
+            self.events.put_nowait(event)
+
+
+async def _print_stream(controllers):
+    monitor = FleetMonitor(controllers, message_callback=lambda category, message: print(message))
+    await monitor.start()
+    try:
+        async for event in monitor.stream():
+            clock = time.strftime("%H:%M:%S", time.localtime(event.timestamp))
+            millis = int((event.timestamp % 1) * 1000)
+            print(f"[{clock}.{millis:03d}] {event.robot}/{event.task} "
+                  f"{event.module}.{event.routine} line {event.line}")
+    finally:
+        await monitor.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    try:
+        asyncio.run(_print_stream(load_fleet_config(sys.argv[1])))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,41 @@
+# Node IDs exposed by the ABB IoT Gateway. Shared by the clients and by gateway_standin, which
+# serves the same address space locally; RAPID lives in ns=3, the GVL_Station signals in ns=4.
+PROGRAM_POINTER_NODE_TEMPLATE = "ns=3;s=_isac/RAPID/{task}/ProgramPointer"
+
+GVL_STATION_NODE_IDS = {
+    # Robot Status
+    'robot_ready': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotReady',
+    'robot_busy': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotBusy',
+    'robot_error': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotError',
+
+    # Current Position
+    'current_x': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosX',
+    'current_y': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosY',
+    'current_z': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosZ',
+
+    # Target Position
+    'target_x': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosX',
+    'target_y': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosY',
+    'target_z': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosZ',
+
+    # Movement Status
+    'movement_type': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.MovementType',
+    'movement_speed': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.Speed',
+
+    # Program Control
+    'current_program': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.CurrentProgram',
+    'program_running': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ProgramRunning',
+
+    # Digital Outputs (Gripper, Tools)
+    'gripper_status': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.GripperOpen',
+    'tool_status': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ToolActive',
+
+    # Safety
+    'emergency_stop': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.EmergencyStop',
+    'safety_gates': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.SafetyGateClosed'
+}
+
+
+def program_pointer_node_id(task):
+    """Node ID of the program pointer of a RAPID task"""
+    return PROGRAM_POINTER_NODE_TEMPLATE.format(task=task)
@@ -0,0 +1,247 @@
+"""Local stand-in for the ABB IoT Gateway with a scriptable load generator.
+
+Each virtual robot is its own OPC UA server on consecutive ports, exposing the same node IDs as
+the real gateway: the RAPID ProgramPointer (an ExtensionObject with Line/Module/Routine) and the
+GVL_Station signals used by opcua_client.
+
+    python gateway_standin.py --robots 4 --pointer-rate 20 --signal-rate 50
+    python gateway_standin.py --script cycles.yaml
+
+A script file lists the program pointer lines to loop through:
+
+    module: MainModule
+    routine: main
+    cycles:
+      - [15, 16, 17, 22, 23, 34, 35, 36, 37, 38, 59, 60, 61, 62, 63, 84]
+"""
+import argparse
+import heapq
+import random
+import threading
+import time
+
+try:
+    from opcua import Server, ua
+    from opcua.common.type_dictionary_buider import DataTypeDictionaryBuilder, get_ua_class
+except ImportError:
+    print("OPC UA library not installed. Install with: pip install opcua")
+    Server = None
+    ua = None
+
+from gateway_nodes import GVL_STATION_NODE_IDS, program_pointer_node_id
+
+BASE_PORT = 61510
+ENDPOINT_TEMPLATE = "opc.tcp://0.0.0.0:{port}/ABB.IoTGateway"
+
+# Namespace indexes must match the real gateway: RAPID in ns=3, GVL_Station in ns=4
+NAMESPACES = ["urn:abb:iotgateway", "urn:abb:iotgateway:rapid", "urn:festo:cpx-e-cec:application"]
+
+# Variant type and initial value of every GVL_Station signal; anything not listed is a Boolean flag
+SIGNAL_TYPES = {
+    'current_x': ("Double", 0.0),
+    'current_y': ("Double", 0.0),
+    'current_z': ("Double", 0.0),
+    'target_x': ("Double", 0.0),
+    'target_y': ("Double", 0.0),
+    'target_z': ("Double", 0.0),
+    'movement_type': ("Int16", 0),
+    'movement_speed': ("Double", 0.0),
+    'current_program': ("String", "MainModule"),
+}
+FLAG_TYPE = ("Boolean", False)
+
+# One pick-and-place cycle per shape, following main.py's built-in line numbers; used when the
+# RAPID program can't be loaded
+PICKUP_LINES = {23: [34, 35, 36, 37, 38], 25: [39, 40, 41, 42, 43], 27: [44, 45, 46, 47, 48],
+                29: [49, 50, 51, 52, 53], 31: [54, 55, 56, 57, 58]}
+PLACE_LINES = [[60, 61, 62, 63], [64, 65, 66, 67, 68], [69, 70, 71, 72, 73],
+               [74, 75, 76, 77, 78], [79, 80, 81, 82, 83]]
+BUILT_IN_CYCLES = [[15, 16, 17, 22, case] + pickup + [59] + place + [84]
+                   for (case, pickup), place in zip(sorted(PICKUP_LINES.items()), PLACE_LINES)]
+
+
+def default_cycles():
+    """Program pointer cycles of the RAPID program next to this file, else the built-in ones"""
+    from rapid_program import load_program, RapidParseError
+
+    try:
+        return load_program().cycles or BUILT_IN_CYCLES
+    except (OSError, RapidParseError) as e:
+        print(f"Using built-in pointer cycles: {e}")
+        return BUILT_IN_CYCLES
+
+
+class GatewayStandIn:
+    """One virtual robot controller behind its own OPC UA endpoint"""
+
+    def __init__(self, port, tasks=("T_ROB1",)):
+        self.endpoint = ENDPOINT_TEMPLATE.format(port=port)
+        self.server = Server()
+        self.server.set_endpoint(self.endpoint)
+        self.server.set_server_name(f"ABB IoT Gateway stand-in :{port}")
+        for uri in NAMESPACES:
+            self.server.register_namespace(uri)
+        self.rapid_idx = self.server.get_namespace_index(NAMESPACES[1])
+
+        self._create_program_pointer_type()
+        self.pointers = {task: self._add_program_pointer(task) for task in tasks}
+        self.signals = self._add_gvl_signals()
+
+    def _create_program_pointer_type(self):
+        """Publish a ProgramPointer structure in a type dictionary so clients decode it like the real one"""
+        builder = DataTypeDictionaryBuilder(self.server, self.rapid_idx, NAMESPACES[1], "ABB_RAPID")
+        self.pointer_type = builder.create_data_type("ProgramPointer")
+        self.pointer_type.add_field("Module", ua.VariantType.String)
+        self.pointer_type.add_field("Routine", ua.VariantType.String)
+        self.pointer_type.add_field("Line", ua.VariantType.Int32)
+        builder.set_dict_byte_string()
+        self.server.load_type_definitions()
+        self.pointer_class = get_ua_class("ProgramPointer")
+
+    def _add_program_pointer(self, task):
+        return self.server.nodes.objects.add_variable(program_pointer_node_id(task), f"{task}_ProgramPointer",
+                                                      ua.Variant(None, ua.VariantType.Null),
+                                                      datatype=self.pointer_type.data_type)
+
+    def _add_gvl_signals(self):
+        signals = {}
+        for name, node_id in GVL_STATION_NODE_IDS.items():
+            type_name, initial = SIGNAL_TYPES.get(name, FLAG_TYPE)
+            variant = ua.Variant(initial, getattr(ua.VariantType, type_name))
+            signals[name] = self.server.nodes.objects.add_variable(node_id, name, variant)
+        return signals
+
+    def start(self):
+        self.server.start()
+
+    def stop(self):
+        self.server.stop()
+
+    def set_program_pointer(self, line, module="MainModule", routine="main", task="T_ROB1"):
+        pointer = self.pointer_class()
+        pointer.Module = module
+        pointer.Routine = routine
+        pointer.Line = line
+        self.pointers[task].set_value(pointer)
+
+    def set_signal(self, name, value):
+        type_name, _ = SIGNAL_TYPES.get(name, FLAG_TYPE)
+        self.signals[name].set_value(ua.Variant(value, getattr(ua.VariantType, type_name)))
+
+
+class LoadGenerator:
+    """Drives program pointer and signal changes on many stand-ins from a single scheduler thread"""
+
+    def __init__(self, stand_ins, cycles=None, pointer_rate=2.0, signal_rate=2.0, module="MainModule",
+                 routine="main"):
+        self.stand_ins = stand_ins
+        self.cycles = cycles or default_cycles()
+        self.pointer_period = 1.0 / pointer_rate if pointer_rate else None
+        self.signal_period = 1.0 / signal_rate if signal_rate else None
+        self.module = module
+        self.routine = routine
+        self.events_sent = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        now = time.perf_counter()
+        schedule = []  # heap of (due time, robot index, kind, state)
+        for i in range(len(self.stand_ins)):
+            # Spread robots over one period so their updates don't all land at once
+            offset = random.random()
+            if self.pointer_period:
+                heapq.heappush(schedule, (now + offset * self.pointer_period, i, "pointer", self._pointer_steps()))
+            if self.signal_period:
+                heapq.heappush(schedule, (now + offset * self.signal_period, i, "signal", [0.0, 0.0, 0.0]))
+
+        while schedule and not self._stop.is_set():
+            due, i, kind, state = heapq.heappop(schedule)
+            delay = due - time.perf_counter()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            try:
+                if kind == "pointer":
+                    self.stand_ins[i].set_program_pointer(next(state), self.module, self.routine)
+                    period = self.pointer_period
+                else:
+                    self._step_signals(self.stand_ins[i], state)
+                    period = self.signal_period
+                self.events_sent += 1
+            except Exception as e:
+                print(f"Load generator error on robot {i + 1}: {e}")
+                period = self.pointer_period if kind == "pointer" else self.signal_period
+            heapq.heappush(schedule, (due + period, i, kind, state))
+
+    def _pointer_steps(self):
+        """Endless program pointer sequence, picking a random shape cycle each time"""
+        while True:
+            for line in random.choice(self.cycles):
+                yield line
+
+    @staticmethod
+    def _step_signals(stand_in, position):
+        """Random-walk the position and toggle a status flag"""
+        axis = random.randrange(3)
+        position[axis] += random.uniform(-5.0, 5.0)
+        stand_in.set_signal(("current_x", "current_y", "current_z")[axis], position[axis])
+        stand_in.set_signal(random.choice(("robot_busy", "robot_ready", "gripper_status")),
+                            random.random() < 0.5)
+
+
+def load_script(path):
+    """Read module, routine and pointer cycles from a YAML script"""
+    import yaml
+
+    with open(path, 'r') as f:
+        script = yaml.safe_load(f) or {}
+    return script.get('cycles') or default_cycles(), script.get('module', "MainModule"), \
+        script.get('routine', "main")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--robots', type=int, default=1, help="virtual robots, one endpoint each")
+    parser.add_argument('--port', type=int, default=BASE_PORT, help="port of the first robot")
+    parser.add_argument('--tasks', nargs='+', default=["T_ROB1"], help="RAPID tasks per robot")
+    parser.add_argument('--pointer-rate', type=float, default=2.0, help="program pointer changes/s per robot")
+    parser.add_argument('--signal-rate', type=float, default=2.0, help="GVL signal changes/s per robot")
+    parser.add_argument('--script', help="YAML file with program pointer cycles")
+    args = parser.parse_args()
+
+    if Server is None:
+        return
+
+    cycles, module, routine = load_script(args.script) if args.script else (default_cycles(), "MainModule", "main")
+    stand_ins = [GatewayStandIn(args.port + i, args.tasks) for i in range(args.robots)]
+    for stand_in in stand_ins:
+        stand_in.start()
+        print(f"Serving {stand_in.endpoint}")
+
+    generator = LoadGenerator(stand_ins, cycles, args.pointer_rate, args.signal_rate, module, routine)
+    generator.start()
+    started = time.time()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{generator.events_sent / (time.time() - started):.0f} events/s across {args.robots} robots")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        generator.stop()
+        for stand_in in stand_ins:
+            stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Vectorised kinematics of robot position samples.
+
+Takes a window of samples as NumPy arrays - timestamps in seconds and x/y/z in mm - and derives
+displacement, velocity, acceleration and jerk by finite differences over the actual sample
+spacing, plus path length and idle periods. Works the same on a live PositionRingBuffer and on
+history read back from the telemetry store.
+"""
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy not installed. Install with: pip install numpy")
+    np = None
+
+DEFAULT_IDLE_SPEED = 1.0  # mm/s below which the robot counts as standing still
+DEFAULT_MIN_IDLE = 0.5  # seconds of standing still before it is reported as idle
+DEFAULT_BUFFER_SIZE = 4096
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Kinematics analysis needs NumPy. Install with: pip install numpy")
+
+
+class Kinematics:
+    """Derived motion of one window of samples.
+
+    Per-interval arrays have one row less than the samples, each derivative one row less again;
+    velocity and the higher derivatives are vectors in mm/s, mm/s^2 and mm/s^3.
+    """
+
+    def __init__(self, timestamps, positions, idle_speed=DEFAULT_IDLE_SPEED, min_idle=DEFAULT_MIN_IDLE):
+        self.timestamps = timestamps
+        self.positions = positions
+        self.displacement = np.diff(positions, axis=0)
+        intervals = np.diff(timestamps)
+        self.step_lengths = np.linalg.norm(self.displacement, axis=1)
+        self.path_length = float(self.step_lengths.sum())
+        self.net_displacement = positions[-1] - positions[0] if len(positions) else np.zeros(3)
+
+        # Each derivative sits at the midpoint of the interval it was taken over
+        self.velocity = self.displacement / intervals[:, None]
+        self.speed = self.step_lengths / intervals
+        velocity_times = (timestamps[1:] + timestamps[:-1]) / 2
+        self.acceleration = np.diff(self.velocity, axis=0) / np.diff(velocity_times)[:, None]
+        acceleration_times = (velocity_times[1:] + velocity_times[:-1]) / 2
+        self.jerk = np.diff(self.acceleration, axis=0) / np.diff(acceleration_times)[:, None]
+
+        self.idle_intervals = _idle_intervals(timestamps, self.speed, idle_speed, min_idle)
+        self.idle_seconds = float(sum(end - start for start, end in self.idle_intervals))
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self.timestamps) > 1 else 0.0
+
+    def summary(self):
+        def peak(values):
+            return float(np.linalg.norm(values, axis=1).max()) if len(values) else None
+
+        return {
+            'samples': len(self.timestamps),
+            'duration': self.duration,
+            'path_length': self.path_length,
+            'net_displacement': float(np.linalg.norm(self.net_displacement)),
+            'mean_speed': self.path_length / self.duration if self.duration else None,
+            'max_speed': float(self.speed.max()) if len(self.speed) else None,
+            'max_acceleration': peak(self.acceleration),
+            'max_jerk': peak(self.jerk),
+            'idle_seconds': self.idle_seconds,
+            'idle_periods': len(self.idle_intervals),
+        }
+
+
+def analyse(timestamps, x, y, z, idle_speed=DEFAULT_IDLE_SPEED, min_idle=DEFAULT_MIN_IDLE):
+    """Kinematics of samples ordered by time; samples sharing a timestamp keep only the last"""
+    _require_numpy()
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    positions = np.column_stack((x, y, z)).astype(np.float64, copy=False)
+    if len(timestamps) > 1:
+        keep = np.append(np.diff(timestamps) > 0, True)
+        if not keep.all():
+            timestamps, positions = timestamps[keep], positions[keep]
+    return Kinematics(timestamps, positions, idle_speed, min_idle)
+
+
+def _idle_intervals(timestamps, speed, idle_speed, min_idle):
+    """(start, end) of every run of intervals slower than idle_speed lasting at least min_idle"""
+    still = (speed < idle_speed).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], still, [0])))
+    starts = np.flatnonzero(edges == 1)  # first still interval of each run
+    ends = np.flatnonzero(edges == -1)  # one past the last
+    start_times, end_times = timestamps[starts], timestamps[ends]
+    long_enough = end_times - start_times >= min_idle
+    return list(zip(start_times[long_enough].tolist(), end_times[long_enough].tolist()))
+
+
+def analyse_range(directory=None, start=None, end=None, idle_speed=DEFAULT_IDLE_SPEED, min_idle=DEFAULT_MIN_IDLE):
+    """Kinematics of recorded telemetry between two timestamps"""
+    from telemetry_store import DEFAULT_DIRECTORY, read_range
+
+    data = read_range(directory or DEFAULT_DIRECTORY, start, end, ("timestamp", "x", "y", "z"))
+    # Program pointer rows repeat the last position; only rows where it moved are samples, plus the
+    # last row so a robot standing still at the end of the range shows up as idle
+    positions = np.column_stack((data["x"], data["y"], data["z"]))
+    moved = np.ones(len(positions), dtype=bool)
+    moved[1:-1] = np.any(positions[1:-1] != positions[:-2], axis=1)
+    return analyse(data["timestamp"][moved], data["x"][moved], data["y"][moved], data["z"][moved],
+                   idle_speed, min_idle)
+
+
+class PositionRingBuffer:
+    """The most recent position samples in preallocated arrays, for live analysis"""
+
+    def __init__(self, capacity=DEFAULT_BUFFER_SIZE):
+        _require_numpy()
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.positions = np.zeros((capacity, 3))
+        self.count = 0  # samples ever appended
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, x, y, z):
+        with self.lock:
+            i = self.count % self.capacity
+            self.timestamps[i] = timestamp
+            self.positions[i] = (x, y, z)
+            self.count += 1
+
+    def window(self, seconds=None, until=None):
+        """(timestamps, positions) in time order, optionally only the `seconds` up to `until`.
+
+        until defaults to the newest sample. The gateway only pushes a position when it changes, so a
+        later until carries the newest position forward to it, and a window starting after a sample
+        begins with the position that sample left the robot in.
+        """
+        with self.lock:
+            if self.count <= self.capacity:
+                timestamps = self.timestamps[:self.count].copy()
+                positions = self.positions[:self.count].copy()
+            else:
+                split = self.count % self.capacity
+                timestamps = np.concatenate((self.timestamps[split:], self.timestamps[:split]))
+                positions = np.concatenate((self.positions[split:], self.positions[:split]))
+        if until is not None and len(timestamps) and until > timestamps[-1]:
+            timestamps = np.append(timestamps, until)
+            positions = np.vstack((positions, positions[-1]))
+        if seconds is not None and len(timestamps):
+            start = timestamps[-1] - seconds
+            first = np.searchsorted(timestamps, start, side="left")
+            if until is not None and 0 < first < len(timestamps) and timestamps[first] > start:
+                first -= 1
+                timestamps[first] = start  # held since the earlier sample
+            timestamps, positions = timestamps[first:], positions[first:]
+        return timestamps, positions
+
+    def analyse(self, seconds=None, idle_speed=DEFAULT_IDLE_SPEED, min_idle=DEFAULT_MIN_IDLE, until=None):
+        timestamps, positions = self.window(seconds, until)
+        return analyse(timestamps, positions[:, 0], positions[:, 1], positions[:, 2], idle_speed, min_idle)
@@ -0,0 +1,75 @@
+"""Bounded, batched view over a Tk text widget for the execution log.
+
+Lines are collected between frames and written with a single insert. Once the widget holds more
+than max_lines, the oldest trim_lines are cut in one delete and appended to a backing file, so
+memory and insert cost stay flat over a shift.
+"""
+import os
+import time
+import tkinter as tk
+
+from tracing import tracer, ERROR
+
+DEFAULT_MAX_LINES = 5000
+DEFAULT_TRIM_LINES = 1000
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+
+class BoundedLogView:
+    """Appends timestamped lines to a disabled Text widget; call flush() once per frame on the Tk thread"""
+
+    def __init__(self, text, max_lines=DEFAULT_MAX_LINES, trim_lines=DEFAULT_TRIM_LINES, archive_path=None,
+                 time_tag="execution_time"):
+        if not 0 < trim_lines <= max_lines:
+            raise ValueError("trim_lines must be between 1 and max_lines")
+        self.text = text
+        self.max_lines = max_lines
+        self.trim_lines = trim_lines
+        self.time_tag = time_tag
+        self.archive_path = archive_path or os.path.join(
+            DEFAULT_ARCHIVE_DIR, time.strftime("execution_%Y%m%d_%H%M%S.log"))
+        self.archived_lines = 0
+        self.pending = []  # (timestamp, message) waiting for the next flush
+
+    def append(self, message):
+        """Queue a line; it appears on the next flush"""
+        self.pending.append((time.strftime("%H:%M:%S"), message))
+
+    def flush(self):
+        """Write all queued lines with one insert, then trim if over the limit"""
+        if not self.pending:
+            return
+        lines, self.pending = self.pending, []
+
+        # Text.insert takes alternating chars/tags arguments, so the whole batch is one Tcl call
+        chunks = []
+        for timestamp, message in lines:
+            chunks.extend((f"[{timestamp}] ", self.time_tag, f"{message}\n", ()))
+
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, *chunks)
+        if self.line_count() > self.max_lines:
+            self._trim()
+        self.text.see(tk.END)
+        self.text.config(state=tk.DISABLED)
+
+    def line_count(self):
+        """Lines currently in the widget"""
+        return int(self.text.index("end-1c").split(".")[0]) - 1
+
+    def _trim(self):
+        """Move the oldest lines to the archive so the widget drops back below max_lines"""
+        excess = self.line_count() - self.max_lines + self.trim_lines
+        cut = f"{excess + 1}.0"
+        self._archive(self.text.get("1.0", cut))
+        self.text.delete("1.0", cut)
+        self.archived_lines += excess
+
+    def _archive(self, chunk):
+        try:
+            os.makedirs(os.path.dirname(self.archive_path), exist_ok=True)
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                f.write(chunk)
+        except OSError as e:
+            # Losing old scrollback beats stalling the UI
+            tracer.trace(ERROR, "ui", "Could not archive execution log to %s: %s", self.archive_path, e)
@@ -7,11 +7,27 @@ import re
 import os
 import warnings
 from opcua import Client, ua
-from opcua.ua import utils
 import logging
 import pyttsx3
-import queue
+import heapq
+import itertools
 import collections
+import random
+import atexit
+from subscription_profiles import get_profile, make_monitored_item
+from type_cache import load_type_definitions_cached
+from program_pointer_decoder import ProgramPointerDecoder, ProgramPointerDecodeError
+from notification_log import NotificationRecorder
+from tracing import tracer, DEBUG, INFO, ERROR
+from log_view import BoundedLogView
+from speech_cache import SpeechCache, can_play, play_clip, stop_playback
+from message_index import message_tables, CycleTracker, SILENT
+from cycle_analytics import CycleAnalytics
+from telemetry_store import TelemetryStore
+from kinematics import PositionRingBuffer
+from gateway_nodes import GVL_STATION_NODE_IDS
+from opcua_client import PositionSampler, source_timestamp
+from rapid_program import load_program, RapidParseError, ProgramWatcher, DEFAULT_PROGRAM_PATH
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -23,6 +39,22 @@ logger = logging.getLogger(__name__)
 DEFAULT_OPC_UA_URL = "opc.tcp://desktop-j8ae1eh:61510/ABB.IoTGateway"
 PROGRAM_POINT_NODE_ID = "ns=3;s=_isac/RAPID/T_ROB1/ProgramPointer"
 
+# Robot position axes, monitored next to the program pointer for telemetry: client handle -> axis
+POSITION_HANDLES = {2: 'x', 3: 'y', 4: 'z'}
+
+# Events from the OPC UA and speech threads are applied on the Tk thread in batches
+UI_TICK_MS = 50
+UI_EVENT_BATCH = 500  # most events applied per tick, so a burst can't freeze a frame
+
+# Execution log scrollback; the oldest EXECUTION_LOG_TRIM lines move to logs/ when the cap is hit
+EXECUTION_LOG_MAX_LINES = 5000
+EXECUTION_LOG_TRIM = 1000
+
+# Seconds of recent position samples summarised in the status bar
+MOTION_WINDOW_SECONDS = 30.0
+
+# Built-in message tables, used when the RAPID program can't be loaded; normally the tables are
+# generated from the program source by rapid_program.load_program
 # Updated Program Point Actions Mapping for different user levels
 PROGRAM_POINT_ACTIONS = {
     # Main movements
@@ -402,6 +434,69 @@ MOVEMENT_GROUPS = {
     "final_movements": [85, 86, 87, 88, 89]
 }
 
+# Consolidated message for each movement group, per user level
+MOVEMENT_GROUP_MESSAGES = {
+    "circle_pickup": {
+        "level1": "Executing circle pickup sequence - moving down, activating vacuum, and returning to safe height",
+        "level2": "Circle pickup: approach, vacuum on, safe return",
+        "level3": "Circle pickup"
+    },
+    "star_pickup": {
+        "level1": "Executing star pickup sequence - moving down, activating vacuum, and returning to safe height",
+        "level2": "Star pickup: approach, vacuum on, safe return",
+        "level3": "Star pickup"
+    },
+    "hexagon_pickup": {
+        "level1": "Executing hexagon pickup sequence - moving down, activating vacuum, and returning to safe height",
+        "level2": "Hexagon pickup: approach, vacuum on, safe return",
+        "level3": "Hexagon pickup"
+    },
+    "triangle_pickup": {
+        "level1": "Executing triangle pickup sequence - moving down, activating vacuum, and returning to safe height",
+        "level2": "Triangle pickup: approach, vacuum on, safe return",
+        "level3": "Triangle pickup"
+    },
+    "square_pickup": {
+        "level1": "Executing square pickup sequence - moving down, activating vacuum, and returning to safe height",
+        "level2": "Square pickup: approach, vacuum on, safe return",
+        "level3": "Square pickup"
+    },
+    "circle_place": {
+        "level1": "Executing circle placing sequence - moving down, releasing vacuum, and returning to safe height",
+        "level2": "Circle place: approach, vacuum off, safe return",
+        "level3": "Circle place"
+    },
+    "star_place": {
+        "level1": "Executing star placing sequence - moving down, releasing vacuum, and returning to safe height",
+        "level2": "Star place: approach, vacuum off, safe return",
+        "level3": "Star place"
+    },
+    "hexagon_place": {
+        "level1": "Executing hexagon placing sequence - moving down, releasing vacuum, and returning to safe height",
+        "level2": "Hexagon place: approach, vacuum off, safe return",
+        "level3": "Hexagon place"
+    },
+    "triangle_place": {
+        "level1": "Executing triangle placing sequence - moving down, releasing vacuum, and returning to safe height",
+        "level2": "Triangle place: approach, vacuum off, safe return",
+        "level3": "Triangle place"
+    },
+    "square_place": {
+        "level1": "Executing square placing sequence - moving down, releasing vacuum, and returning to safe height",
+        "level2": "Square place: approach, vacuum off, safe return",
+        "level3": "Square place"
+    },
+    "final_movements": {
+        "level1": "Executing final position movements through p30 to p70",
+        "level2": "Final movement sequence: positions p30-p70",
+        "level3": "Final moves"
+    }
+}
+
+# Home move that starts each built-in cycle, and the return move that ends it
+CYCLE_START_LINE = 15
+CYCLE_END_LINE = 84
+
 # Lines that should be completely SILENT (no messages at all)
 SILENT_LINES = {
     # These are typically internal program flow lines that don't need user notification
@@ -409,17 +504,86 @@ SILENT_LINES = {
 }
 
 
+def speech_phrases():
+    """Every fixed phrase the monitor can speak, for all user levels"""
+    tables = message_tables.tables
+    for table in (tables.actions, tables.group_messages):
+        for messages in table.values():
+            yield from messages.values()
+
+
+def load_message_tables(path=DEFAULT_PROGRAM_PATH):
+    """Publish the tables generated from a RAPID program, or the built-in ones if it can't be loaded"""
+    try:
+        program = load_program(path)
+    except (OSError, RapidParseError) as e:
+        tracer.trace(ERROR, "program", "Using built-in message tables, could not load %s: %s", path, e)
+        message_tables.publish(PROGRAM_POINT_ACTIONS, MOVEMENT_GROUPS, MOVEMENT_GROUP_MESSAGES, SILENT_LINES,
+                               CYCLE_START_LINE, CYCLE_END_LINE)
+        return None
+    publish_program(program)
+    return program
+
+
+def publish_program(program):
+    """Swap in the tables of a (re)loaded program; handlers pick them up on their next notification"""
+    message_tables.publish(program.actions, program.movement_groups, program.group_messages,
+                           program.silent_lines, program.cycle_start, program.cycle_end)
+
+
+# Message priority classes, most urgent first
+PRIORITY_ALARM = 0  # errors and safety events; shown without waiting for a second message
+PRIORITY_STATUS = 1  # connection state and operator actions
+PRIORITY_INFO = 2  # program progress
+
+# Seconds a message may wait before it is stale and dropped; None never expires
+MESSAGE_DEADLINES = {PRIORITY_ALARM: None, PRIORITY_STATUS: 30.0, PRIORITY_INFO: 10.0}
+
+# Phrases rendered per engine run when building the clip cache; queued speech waits at most one chunk
+RENDER_CHUNK = 4
+
+
+class Utterance:
+    __slots__ = ('parts', 'callback', 'priority', 'queued_at', 'interrupted')
+
+    def __init__(self, parts, callback, priority, queued_at):
+        self.parts = parts
+        self.callback = callback
+        self.priority = priority
+        self.queued_at = queued_at
+        self.interrupted = threading.Event()  # set to cut this utterance short
+
+
 class TextToSpeechManager:
-    """Manages text-to-speech functionality"""
+    """Manages text-to-speech functionality.
+
+    One long-lived worker thread owns the engine and speaks queued utterances most urgent first.
+    Every utterance gets its own completion callback, called once whether it was spoken, cut
+    off by a more urgent one, or dropped by stop_speech.
+    """
 
     def __init__(self):
         self.engine = None
-        self.speech_queue = queue.Queue()
-        self.is_speaking = False
+        self.speech_queue = []  # heap of (priority, sequence, Utterance)
+        self.sequence = itertools.count()
+        self.commands = threading.Condition()  # guards speech_queue, current and render requests
+        self.current = None  # Utterance being spoken
+        self.render_waiters = []  # Events of the build_audio_cache requests not answered yet
+        self.render_reload = False  # a request arrived since the phrase list was last loaded
+        self.render_phrases = collections.deque()  # catalogue phrases still to render, worker only
+        self.render_added = 0
+        self.render_result = 0
         self.speech_enabled = True
         self.rate = 150  # Default speech rate
-        self.speech_callbacks = []  # Callbacks to notify when speech finishes
+        self.voice = None
+        self.audio_cache = SpeechCache()
+        self.queue_latencies = collections.deque(maxlen=200)  # seconds from speak_text to speaking
+        self.counters = collections.Counter()  # spoken, interrupted, cancelled
+        self.worker = None
         self.initialize_engine()
+        if self.engine:
+            self.worker = threading.Thread(target=self._worker_loop, name="speech", daemon=True)
+            self.worker.start()
 
     def initialize_engine(self):
         """Initialize the TTS engine"""
@@ -432,9 +596,7 @@ class TextToSpeechManager:
                 print(f"Voice {i}: {voice.name}")
 
             self.engine.setProperty('rate', self.rate)
-
-            # Connect the callback for when speech finishes
-            self.engine.connect('finished-utterance', self._on_speech_finished)
+            self.voice = self.engine.getProperty('voice')
 
             print("TTS Engine initialized successfully")
 
@@ -442,71 +604,159 @@ class TextToSpeechManager:
             print(f"Failed to initialize TTS engine: {e}")
             self.engine = None
 
-    def _on_speech_finished(self, name, completed):
-        """Called when speech finishes"""
-        print(f"TTS: Speech finished callback - completed: {completed}")
-        if completed:
-            # Notify all callbacks that speech is done
-            for callback in self.speech_callbacks:
-                try:
-                    callback()
-                except Exception as e:
-                    print(f"Error in speech callback: {e}")
-            self.speech_callbacks.clear()
-        self.is_speaking = False
-
-    def speak_text(self, text, callback=None):
-        """Add text to speech queue with optional callback"""
-        if not text or not text.strip():
+    def speak_text(self, text, callback=None, priority=PRIORITY_INFO):
+        """Queue text, or a list of parts spoken back to back, with an optional completion callback.
+
+        An utterance more urgent than the one being spoken cuts it off.
+        """
+        parts = [text] if isinstance(text, str) else [part for part in text if part]
+        if not any(part.strip() for part in parts):
             if callback:
                 callback()  # Call immediately if no text
             return
 
-        print(f"TTS: Speaking: {text}")
+        if tracer.level >= DEBUG:
+            tracer.trace(DEBUG, "tts", "Speaking: %s", text)
 
         if not self.engine:
-            print("TTS: Engine not available")
+            tracer.trace(INFO, "tts", "Engine not available")
             if callback:
                 callback()
             return
 
         if not self.speech_enabled:
-            print("TTS: Speech disabled")
+            tracer.trace(INFO, "tts", "Speech disabled")
             if callback:
                 callback()
             return
 
-        # Add callback if provided
-        if callback:
-            self.speech_callbacks.append(callback)
-
-        self.speech_queue.put(text)
-        print(f"TTS: Added to queue. Queue size: {self.speech_queue.qsize()}")
+        utterance = Utterance(parts, callback, priority, time.monotonic())
+        with self.commands:
+            heapq.heappush(self.speech_queue, (priority, next(self.sequence), utterance))
+            if self.current is not None and priority < self.current.priority:
+                self._interrupt_current()
+            if tracer.level >= DEBUG:
+                tracer.trace(DEBUG, "tts", "Added to queue. Queue size: %d", len(self.speech_queue))
+            self.commands.notify()
+
+    def _interrupt_current(self):
+        """Cut off the utterance being spoken; call with self.commands held.
+
+        The worker needs the same lock to finish that utterance and take the next one, so the
+        stop can only land on the utterance it was meant for.
+        """
+        self.current.interrupted.set()
+        self.engine.stop()
+        stop_playback()
+
+    def _worker_loop(self):
+        """Speak queued utterances one at a time; render the clip cache a chunk at a time when idle"""
+        while True:
+            with self.commands:
+                while not self.speech_queue and not self.render_waiters:
+                    self.commands.wait()
+                if self.speech_queue:
+                    _, _, utterance = heapq.heappop(self.speech_queue)
+                    self.current = utterance
+                else:
+                    utterance = None
+                    reload, self.render_reload = self.render_reload, False
+
+            if utterance is not None:
+                self._speak_utterance(utterance)
+                continue
+            if reload:
+                self._load_render_phrases()
+            self._render_chunk()
+
+    def _speak_utterance(self, utterance):
+        latency = time.monotonic() - utterance.queued_at
+        self.queue_latencies.append(latency)
+        if tracer.level >= DEBUG:
+            tracer.trace(DEBUG, "tts", "Started after %.0f ms in queue", latency * 1000)
 
-        if not self.is_speaking:
-            self.process_speech_queue()
+        try:
+            for part in utterance.parts:
+                if utterance.interrupted.is_set():
+                    break
+                # Clean the text for speech (remove timestamps, etc.)
+                self._speak_part(self.clean_text_for_speech(part), utterance.interrupted)
+        except Exception as e:
+            tracer.trace(ERROR, "tts", "Speech error: %s", e)
 
-    def process_speech_queue(self):
-        """Process the speech queue in a separate thread"""
+        with self.commands:
+            self.current = None
+        self.counters['interrupted' if utterance.interrupted.is_set() else 'spoken'] += 1
+        self._complete(utterance)
 
-        def _speak():
-            self.is_speaking = True
-            while not self.speech_queue.empty():
-                try:
-                    text = self.speech_queue.get_nowait()
-                    # Clean the text for speech (remove timestamps, etc.)
-                    clean_text = self.clean_text_for_speech(text)
-                    if clean_text:
-                        self.engine.say(clean_text)
-                        self.engine.runAndWait()
-                    self.speech_queue.task_done()
-                except Exception as e:
-                    print(f"Speech error: {e}")
-                    break
-            self.is_speaking = False
+    def _complete(self, utterance):
+        """Run the utterance's completion callback"""
+        if utterance.callback:
+            try:
+                utterance.callback()
+            except Exception as e:
+                tracer.trace(ERROR, "tts", "Error in speech callback: %s", e)
 
-        if not self.is_speaking and self.engine:
-            threading.Thread(target=_speak, daemon=True).start()
+    def _speak_part(self, text, interrupted):
+        """Play the pre-rendered clip for text if there is one, otherwise synthesise it live"""
+        if not text:
+            return
+        clip = self.audio_cache.lookup(text, self.voice, self.rate) if can_play() else None
+        if clip:
+            try:
+                play_clip(clip, interrupted)
+                return
+            except Exception as e:
+                tracer.trace(ERROR, "tts", "Cached clip failed, speaking live: %s", e)
+        with self.commands:
+            # An interrupt issued after this check stops the engine, which drops the queued text
+            if interrupted.is_set():
+                return
+            self.engine.say(text)
+        self.engine.runAndWait()
+
+    def build_audio_cache(self, wait=True):
+        """Render every catalogue phrase for the current voice and rate on the speech worker.
+
+        Rendering runs in chunks of RENDER_CHUNK phrases whenever nothing is waiting to be spoken.
+        Returns the clips added, or None when not waiting.
+        """
+        if not self.engine or not can_play():
+            return 0
+        done = threading.Event()
+        with self.commands:
+            self.render_waiters.append(done)
+            self.render_reload = True
+            self.commands.notify()
+        if not wait:
+            return None
+        done.wait()
+        return self.render_result
+
+    def _load_render_phrases(self):
+        """(Re)load the phrase list from the current catalogue; a running render picks up the new one"""
+        self.render_phrases = collections.deque(
+            self.clean_text_for_speech(phrase.encode('ascii', 'ignore').decode('ascii'))
+            for phrase in speech_phrases())
+
+    def _render_chunk(self):
+        """Render the next few phrases, then go back to the queue; answers the waiters when done"""
+        chunk = [self.render_phrases.popleft() for _ in range(min(RENDER_CHUNK, len(self.render_phrases)))]
+        try:
+            if chunk:
+                self.render_added += self.audio_cache.render(self.engine, chunk, self.voice, self.rate)
+        except Exception as e:
+            tracer.trace(ERROR, "tts", "Rendering the audio cache failed: %s", e)
+            self.render_phrases.clear()
+        if self.render_phrases:
+            return
+        with self.commands:
+            if self.render_reload:
+                return  # a newer request reloads the catalogue before anyone is answered
+            waiters, self.render_waiters = self.render_waiters, []
+        self.render_result, self.render_added = self.render_added, 0
+        for done in waiters:
+            done.set()
 
     def clean_text_for_speech(self, text):
         """Clean text for better speech output"""
@@ -533,90 +783,246 @@ class TextToSpeechManager:
             self.engine.setProperty('rate', rate)
 
     def stop_speech(self):
-        """Stop current speech"""
-        if self.engine:
-            self.engine.stop()
-        # Clear the queue
-        while not self.speech_queue.empty():
-            try:
-                self.speech_queue.get_nowait()
-                self.speech_queue.task_done()
-            except:
-                break
-        self.is_speaking = False
+        """Stop current speech and drop everything queued; their callbacks still run"""
+        with self.commands:
+            cancelled = [utterance for _, _, utterance in self.speech_queue]
+            self.speech_queue.clear()
+            if self.current is not None:
+                self._interrupt_current()
+        self.counters['cancelled'] += len(cancelled)
+        for utterance in cancelled:
+            self._complete(utterance)
 
     def is_speaking_now(self):
         """Check if currently speaking"""
-        return self.is_speaking
+        return self.current is not None
 
+    def get_speech_stats(self):
+        """Speech queue depth, time utterances waited before being spoken and outcome counters"""
+        latencies = sorted(self.queue_latencies)
+        with self.commands:
+            stats = dict(self.counters, queued=len(self.speech_queue), speaking=self.current is not None)
+        stats['latency_p50_ms'] = latencies[len(latencies) // 2] * 1000 if latencies else None
+        stats['latency_max_ms'] = latencies[-1] * 1000 if latencies else None
+        return stats
 
-# Global TTS Manager
-tts_manager = TextToSpeechManager()
 
+# Process-wide services, created by start_services() so importing this module has no side effects
+tts_manager = None  # TextToSpeechManager
+program_tables = None  # ProgramTables the monitor started with, None when on the built-in tables
+program_watcher = None  # re-indexes the RAPID program while the monitor runs
 
-class MessageQueueManager:
-    """Manages message queue with display of only 2 messages at a time"""
 
-    def __init__(self, display_callback, speech_callback):
-        self.message_queue = collections.deque()
+def start_services():
+    """Publish the message tables and start the speech engine; returns the TTS manager"""
+    global tts_manager, program_tables, program_watcher
+    if tts_manager is None:
+        program_tables = load_message_tables()
+        tts_manager = TextToSpeechManager()
+        program_watcher = ProgramWatcher(DEFAULT_PROGRAM_PATH, _on_program_changed)
+    return tts_manager
+
+
+def _on_program_changed(program):
+    """Called on the watcher thread when the RAPID source has been edited"""
+    publish_program(program)
+    tracer.trace(INFO, "program", "Reloaded %s: %d narrated lines, %d movement groups", DEFAULT_PROGRAM_PATH,
+                 len(program.actions), len(program.movement_groups))
+    tts_manager.build_audio_cache(wait=False)  # only the new phrases need rendering
+
+
+class QueuedMessage:
+    __slots__ = ('text', 'priority', 'queued_at', 'expires_at')
+
+    def __init__(self, text, priority, queued_at, expires_at):
+        self.text = text
+        self.priority = priority
+        self.queued_at = queued_at
+        self.expires_at = expires_at
+
+
+class MessageQueueManager:
+    """Manages message queue with display of only 2 messages at a time, most urgent first.
+
+    Stale messages are dropped once their deadline passes, a message identical to one already
+    waiting is coalesced into it, and the backlog is bounded by evicting the oldest least urgent
+    message. A lone message is shown on its own after lone_message_timeout seconds, and a message
+    at preempt_priority or more urgent replaces a less urgent pair mid-speech.
+    """
+
+    def __init__(self, display_callback, speech_callback, max_backlog=50, lone_message_timeout=2.0,
+                 deadlines=None, batch_size=2, preempt_priority=PRIORITY_ALARM):
+        self.deadlines = dict(MESSAGE_DEADLINES if deadlines is None else deadlines)
+        self.queues = {priority: collections.deque() for priority in sorted(self.deadlines)}
         self.display_callback = display_callback
         self.speech_callback = speech_callback
+        self.max_backlog = max_backlog
+        self.lone_message_timeout = lone_message_timeout
+        self.batch_size = batch_size
+        self.preempt_priority = preempt_priority
         self.current_messages = []
+        self.current_priority = None  # most urgent priority in the pair on screen
+        self.generation = 0  # bumped per displayed pair, so callbacks of a cut-off pair are ignored
         self.is_displaying = False
-        self.waiting_for_speech = False
+        self.lock = threading.RLock()  # used from the Tk thread and the timer threads
+        self.lone_timer = None
+        self.counters = collections.Counter()  # queued, displayed, coalesced, expired, evicted, rejected
+
+    def add_message(self, message, priority=PRIORITY_INFO, deadline=None):
+        """Add message to queue; deadline overrides the default for its priority"""
+        now = time.monotonic()
+        if deadline is None:
+            deadline = self.deadlines.get(priority)
+        with self.lock:
+            self.counters['queued'] += 1
+            queue = self.queues[priority]
+            if any(queued.text == message for queued in queue):
+                self.counters['coalesced'] += 1
+                return
+            if self.depth() >= self.max_backlog and not self._make_room(priority):
+                self.counters['rejected'] += 1  # backlog full of more urgent messages
+                return
+            queue.append(self._make_message(message, priority, now, deadline))
+            preempt = (self.is_displaying and priority <= self.preempt_priority
+                       and priority < self.current_priority)
+            if preempt:
+                self.is_displaying = False
+        if preempt:
+            self.display_next_pair()
+        else:
+            self.process_queue()
+
+    def _make_message(self, text, priority, now, deadline):
+        return QueuedMessage(text, priority, now, now + deadline if deadline is not None else None)
 
-    def add_message(self, message):
-        """Add message to queue"""
-        self.message_queue.append(message)
-        self.process_queue()
+    def _make_room(self, priority):
+        """Evict the oldest message that is no more urgent than priority"""
+        for level in sorted(self.queues, reverse=True):
+            if level < priority:
+                break
+            if self.queues[level]:
+                self.queues[level].popleft()
+                self.counters['evicted'] += 1
+                return True
+        return False
 
     def process_queue(self):
         """Process the message queue"""
-        if not self.is_displaying and len(self.message_queue) >= 2:
-            self.display_next_pair()
+        with self.lock:
+            if self.is_displaying:
+                return
+            self._drop_expired()
+            oldest = self._oldest()
+            if oldest is None:
+                return
+            waited = time.monotonic() - oldest.queued_at
+            if not (self.depth() >= self.batch_size or self.queues.get(PRIORITY_ALARM)
+                    or waited >= self.lone_message_timeout):
+                self._arm_lone_timer(self.lone_message_timeout - waited)
+                return
+        self.display_next_pair()
 
     def display_next_pair(self):
         """Display next 2 messages from queue"""
-        if len(self.message_queue) < 2:
-            return
-
-        self.is_displaying = True
-        self.current_messages = []
-
-        # Get next 2 messages
-        for _ in range(2):
-            if self.message_queue:
-                message = self.message_queue.popleft()
-                self.current_messages.append(message)
+        with self.lock:
+            if self.is_displaying:
+                return
+            batch = self._take_batch()
+            if not batch:
+                return
+            self.is_displaying = True
+            self.current_messages = [message.text for message in batch]
+            self.current_priority = min(message.priority for message in batch)
+            self.counters['displayed'] += len(batch)
+            self.generation += 1
+            generation = self.generation
+            messages = list(self.current_messages)
+            priority = self.current_priority
 
         # Display the messages
-        self.display_callback(self.current_messages)
-
-        # Speak both messages together but wait for speech to finish
-        speech_texts = []
-        for message in self.current_messages:
-            speech_texts.append(message)
-
-        # Combine messages for speech
-        combined_speech = " ".join(speech_texts)
-
-        # Speak with callback - text stays until speech finishes
-        self.speech_callback(combined_speech, self._on_speech_finished)
-
-    def _on_speech_finished(self):
+        self.display_callback(messages)
+
+        # Speak with callback - text stays until speech finishes; the messages go as separate
+        # parts so each can come from the audio cache
+        self.speech_callback(messages, lambda: self._on_speech_finished(generation), priority)
+
+    def _take_batch(self):
+        """Pop up to batch_size live messages, most urgent first"""
+        batch = []
+        now = time.monotonic()
+        for queue in self.queues.values():
+            while queue and len(batch) < self.batch_size:
+                message = queue.popleft()
+                if message.expires_at is not None and message.expires_at < now:
+                    self.counters['expired'] += 1
+                    continue
+                batch.append(message)
+        return batch
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        for priority, queue in self.queues.items():
+            if any(m.expires_at is not None and m.expires_at < now for m in queue):
+                live = [m for m in queue if m.expires_at is None or m.expires_at >= now]
+                self.counters['expired'] += len(queue) - len(live)
+                self.queues[priority] = collections.deque(live)
+
+    def _oldest(self):
+        heads = [queue[0] for queue in self.queues.values() if queue]
+        return min(heads, key=lambda m: m.queued_at) if heads else None
+
+    def _arm_lone_timer(self, delay):
+        if self.lone_timer is None or not self.lone_timer.is_alive():
+            self.lone_timer = threading.Timer(max(delay, 0.0), self.process_queue)
+            self.lone_timer.daemon = True
+            self.lone_timer.start()
+
+    def _on_speech_finished(self, generation=None):
         """Called when speech finishes - NOW text stays until this is called"""
-        print("MessageQueue: Speech finished completely, now clearing messages")
+        if generation is not None and generation != self.generation:
+            return  # the pair was cut off by a more urgent one
+        if tracer.level >= DEBUG:
+            tracer.trace(DEBUG, "queue", "Speech finished completely, now clearing messages")
         # Add a small pause after speech finishes before showing next messages
-        threading.Timer(1.0, self.clear_and_continue).start()
+        threading.Timer(1.0, self.clear_and_continue, args=(generation,)).start()
 
-    def clear_and_continue(self):
+    def clear_and_continue(self, generation=None):
         """Clear current display and continue with next messages"""
-        self.current_messages = []
-        self.is_displaying = False
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.current_messages = []
+            self.current_priority = None
+            self.is_displaying = False
         self.display_callback([])  # Clear display
         # Small delay before showing next messages
         threading.Timer(0.5, self.process_queue).start()  # Wait 0.5s then continue
 
+    def clear(self):
+        """Drop every waiting message"""
+        with self.lock:
+            for queue in self.queues.values():
+                queue.clear()
+
+    def depth(self):
+        """Messages waiting to be shown"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    def oldest_age(self):
+        """Seconds the oldest waiting message has been queued, 0 when empty"""
+        with self.lock:
+            oldest = self._oldest()
+            return time.monotonic() - oldest.queued_at if oldest else 0.0
+
+    def get_stats(self):
+        """Queue depth per priority, oldest message age and lifetime counters"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['depth'] = self.depth()
+            stats['depth_by_priority'] = {priority: len(queue) for priority, queue in self.queues.items()}
+            stats['oldest_age'] = self.oldest_age()
+            return stats
+
 
 class OPCUASubscriptionHandler:
     """Handles incoming data change notifications from the OPC UA server."""
@@ -625,206 +1031,89 @@ class OPCUASubscriptionHandler:
         self.gui_app = gui_app
         self.last_point = None
         self.last_line_displayed = None
-        self.processed_groups = set()  # Track which movement groups we've already processed
+        self.cycles = CycleTracker()  # which movement groups have spoken this cycle
+        self.analytics = getattr(gui_app, "cycle_analytics", None)  # CycleAnalytics fed with every new line
+        self.telemetry = getattr(gui_app, "telemetry", None)  # TelemetryStore keeping every pointer update
+        self.positions = getattr(gui_app, "position_sampler", None)  # merges the axis notifications
+        self.message_index = None  # compiled for the operator's level on first use
+        self.decoder = ProgramPointerDecoder(log=self.gui_app.log_opcua_message)
+        self.recorder = None  # NotificationRecorder while recording
 
     def datachange_notification(self, node, val, data):
+        if self.recorder is not None:
+            self.recorder.record(node, val)
         try:
-            print(f"Raw data received: {val}")  # Debug print
-            print(f"Data type: {type(val)}")  # Debug print
-
-            # Process the raw data
-            data_source = None
-            if isinstance(val, ua.ExtensionObject):
-                # Attempt to decode the ExtensionObject
-                try:
-                    if hasattr(val, "Body") and val.Body is not None:
-                        data_source = val.Body
-                        self.gui_app.log_opcua_message(f"Decoded ExtensionObject Body: {data_source}")
-                        print(f"ExtensionObject Body: {data_source}")  # Debug print
-                    else:
-                        decoded = utils.unpack_extension_object(val)
-                        data_source = decoded
-                        self.gui_app.log_opcua_message(f"Unpacked ExtensionObject: {decoded}")
-                        print(f"Unpacked ExtensionObject: {decoded}")  # Debug print
-                except Exception as e:
-                    self.gui_app.log_opcua_message(f"Failed to unpack ExtensionObject: {e}", is_error=True)
-                    print(f"ExtensionObject unpack error: {e}")  # Debug print
-                    return
-            elif hasattr(val, "Value"):
-                data_source = val.Value
-                print(f"Value attribute: {data_source}")  # Debug print
-            else:
-                data_source = val
-                print(f"Direct value: {data_source}")  # Debug print
-
-            current_point = None
-            module_name = "---"
-            routine_name = "---"
-
-            # Extract program pointer data - try different attribute access patterns
-            if hasattr(data_source, "Line"):
-                current_point = data_source.Line
-                module_name = getattr(data_source, "Module", "N/A")
-                routine_name = getattr(data_source, "Routine", "N/A")
-                print(
-                    f"Attribute access - Line: {current_point}, Module: {module_name}, Routine: {routine_name}")  # Debug
-            elif hasattr(data_source, "line"):
-                current_point = data_source.line
-                module_name = getattr(data_source, "module", "N/A")
-                routine_name = getattr(data_source, "routine", "N/A")
-                print(
-                    f"Lowercase attribute access - Line: {current_point}, Module: {module_name}, Routine: {routine_name}")  # Debug
-            elif isinstance(data_source, dict):
-                current_point = data_source.get("Line") or data_source.get("line")
-                module_name = data_source.get("Module", data_source.get("module", "N/A"))
-                routine_name = data_source.get("Routine", data_source.get("routine", "N/A"))
-                print(f"Dict access - Line: {current_point}, Module: {module_name}, Routine: {routine_name}")  # Debug
-            else:
-                # Try to inspect the object's attributes
-                try:
-                    attrs = dir(data_source)
-                    print(f"Available attributes: {attrs}")  # Debug print
-                    # Look for common attribute patterns
-                    for attr in attrs:
-                        if 'line' in attr.lower():
-                            current_point = getattr(data_source, attr, None)
-                            print(f"Found line attribute '{attr}': {current_point}")  # Debug
-                        if 'module' in attr.lower():
-                            module_name = getattr(data_source, attr, "N/A")
-                            print(f"Found module attribute '{attr}': {module_name}")  # Debug
-                        if 'routine' in attr.lower():
-                            routine_name = getattr(data_source, attr, "N/A")
-                            print(f"Found routine attribute '{attr}': {routine_name}")  # Debug
-                except Exception as e:
-                    print(f"Error inspecting object: {e}")  # Debug
-
-            # Convert to integer if necessary
-            if current_point is not None and not isinstance(current_point, int):
-                try:
-                    current_point = int(current_point)
-                except Exception:
-                    self.gui_app.log_opcua_message(f"Line number not convertible: {current_point}", is_error=True)
-                    print(f"Line conversion failed: {current_point}")  # Debug
-                    return
+            if data is not None and data.monitored_item.ClientHandle in POSITION_HANDLES:
+                if self.positions is not None and val is not None:
+                    self.positions.update(POSITION_HANDLES[data.monitored_item.ClientHandle], float(val),
+                                          source_timestamp(data))
+                return
+            try:
+                current_point, module_name, routine_name = self.decoder.decode(val)
+            except ProgramPointerDecodeError as e:
+                self.gui_app.log_opcua_message(str(e), is_error=True)
+                return
 
-            # If we still don't have data, try string parsing
-            if current_point is None and data_source is not None:
-                data_str = str(data_source)
-                print(f"Trying string parsing: {data_str}")  # Debug
-                # Try to extract information from string representation
-                if "Line" in data_str or "Module" in data_str or "Routine" in data_str:
-                    # Simple string parsing as fallback
-                    line_match = re.search(r'Line[=:]\s*(\d+)', data_str)
-                    module_match = re.search(r'Module[=:]\s*([^,\s]+)', data_str)
-                    routine_match = re.search(r'Routine[=:]\s*([^,\s]+)', data_str)
-
-                    if line_match:
-                        current_point = int(line_match.group(1))
-                    if module_match:
-                        module_name = module_match.group(1)
-                    if routine_match:
-                        routine_name = routine_match.group(1)
-
-                    print(
-                        f"String parsed - Line: {current_point}, Module: {module_name}, Routine: {routine_name}")  # Debug
+            if self.telemetry is not None and current_point is not None:
+                # Same clock as the position samples, so the rows interleave in source order
+                self.telemetry.record_pointer(current_point, module_name, routine_name, source_timestamp(data))
 
             # Update GUI status
             self.gui_app.update_robot_status(module_name, routine_name, current_point or "---")
 
             # Only log if new line
             if current_point is not None and current_point != self.last_point:
+                index = self._get_message_index()
+                entry = index.lookup(current_point)
+                group_id = entry[0] if entry is not None and entry is not SILENT else None
+                event, group_speaks = self.cycles.step(index, current_point, group_id)
+                if self.analytics is not None:
+                    self.analytics.submit(time.monotonic(), event,
+                                          index.group_names[group_id] if group_id is not None else None)
+                if event is not None and tracer.level >= DEBUG:
+                    tracer.trace(DEBUG, "handler", "%s %d at line %s", event, self.cycles.cycle, current_point)
+
                 # Check if this line should be completely silent
-                if current_point in SILENT_LINES:
-                    print(f"Line {current_point} is in SILENT_LINES - skipping message")
+                if entry is SILENT:
+                    if tracer.level >= DEBUG:
+                        tracer.trace(DEBUG, "handler", "Line %s is in SILENT_LINES - skipping message",
+                                     current_point)
                     self.last_point = current_point
                     return
 
-                # Check if this line belongs to any movement group
-                movement_message = self._get_movement_group_message(current_point)
+                if entry is not None:
+                    # The first line of a movement group in each cycle sends the consolidated message
+                    message = entry[1] if group_speaks else entry[2]
+                else:
+                    message = None
 
-                if movement_message:
-                    # This is a grouped movement - send consolidated message
-                    self.gui_app.log_opcua_message(f"{movement_message}")
+                if message:
+                    self.gui_app.log_opcua_message(f"{message}")
                 else:
-                    # Individual line - use standard message only if it's defined in PROGRAM_POINT_ACTIONS
-                    user_level = self.gui_app.user_level.lower()
-                    action_info = PROGRAM_POINT_ACTIONS.get(current_point)
-
-                    if action_info:
-                        # Get message for current user level
-                        message = action_info.get(user_level, f"Line {current_point}")
-                        self.gui_app.log_opcua_message(f"{message}")
-                    else:
-                        # Skip completely for lines not in PROGRAM_POINT_ACTIONS
-                        print(f"Line {current_point} not in PROGRAM_POINT_ACTIONS - skipping message")
+                    # Skip completely for lines not in PROGRAM_POINT_ACTIONS
+                    if tracer.level >= DEBUG:
+                        tracer.trace(DEBUG, "handler", "Line %s not in PROGRAM_POINT_ACTIONS - skipping message",
+                                     current_point)
 
                 self.last_point = current_point
         except Exception as e:
             error_msg = f"Error in datachange_notification: {e}"
             self.gui_app.log_opcua_message(error_msg, is_error=True)
-            print(error_msg)  # Debug print
-
-    def _get_movement_group_message(self, current_point):
-        """Check if current point belongs to a movement group and return consolidated message"""
-        user_level = self.gui_app.user_level.lower()
-
-        # Pickup sequences - CORRECTED ORDER
-        pickup_groups = {
-            "circle_pickup": ("Circle", "Executing circle pickup sequence"),
-            "star_pickup": ("Star", "Executing star pickup sequence"),
-            "hexagon_pickup": ("Hexagon", "Executing hexagon pickup sequence"),
-            "triangle_pickup": ("Triangle", "Executing triangle pickup sequence"),
-            "square_pickup": ("Square", "Executing square pickup sequence")
-        }
-
-        for group_name, (shape, message) in pickup_groups.items():
-            if current_point in MOVEMENT_GROUPS[group_name]:
-                if group_name not in self.processed_groups:
-                    self.processed_groups.add(group_name)
-                    if user_level == "level1":
-                        return f"{message} - moving down, activating vacuum, and returning to safe height"
-                    elif user_level == "level2":
-                        return f"{shape} pickup: approach, vacuum on, safe return"
-                    else:
-                        return f"{shape} pickup"
-
-        # Place sequences - CORRECTED ORDER
-        place_groups = {
-            "circle_place": ("Circle", "Executing circle placing sequence"),
-            "star_place": ("Star", "Executing star placing sequence"),
-            "hexagon_place": ("Hexagon", "Executing hexagon placing sequence"),
-            "triangle_place": ("Triangle", "Executing triangle placing sequence"),
-            "square_place": ("Square", "Executing square placing sequence")
-        }
-
-        for group_name, (shape, message) in place_groups.items():
-            if current_point in MOVEMENT_GROUPS[group_name]:
-                if group_name not in self.processed_groups:
-                    self.processed_groups.add(group_name)
-                    if user_level == "level1":
-                        return f"{message} - moving down, releasing vacuum, and returning to safe height"
-                    elif user_level == "level2":
-                        return f"{shape} place: approach, vacuum off, safe return"
-                    else:
-                        return f"{shape} place"
-
-        # Final movements
-        if current_point in MOVEMENT_GROUPS["final_movements"]:
-            if "final_movements" not in self.processed_groups:
-                self.processed_groups.add("final_movements")
-                if user_level == "level1":
-                    return "Executing final position movements through p30 to p70"
-                elif user_level == "level2":
-                    return "Final movement sequence: positions p30-p70"
-                else:
-                    return "Final moves"
+            tracer.trace(ERROR, "handler", error_msg)
 
-        return None
+    def _get_message_index(self):
+        """Compiled index for the operator's level, recompiled when the tables are republished"""
+        index = self.message_index
+        if index is None or index.version != message_tables.version:
+            new_index = message_tables.compile(self.gui_app.user_level)
+            self.cycles.remap(index, new_index)
+            index = self.message_index = new_index
+        return index
 
     def status_change_notification(self, status):
         status_msg = f"Subscription status changed: {status}"
         self.gui_app.log_opcua_message(status_msg)
-        print(status_msg)  # Debug print
+        tracer.trace(INFO, "handler", status_msg)
 
 
 # ... (Rest of the code remains the same - ABBOPCUAConnector, UserLevelManager, LoginSystem, RobotSimulationWindow classes)
@@ -840,20 +1129,39 @@ class ABBOPCUAConnector:
         self.is_monitoring = False
         self.message_callback = message_callback
 
+        # Session supervision: keepalive check and reconnect with exponential backoff
+        self.url = None
+        self.auto_reconnect = True
+        self.keepalive_interval = 2.0  # seconds between server state reads
+        self.backoff_initial = 0.5  # first retry delay in seconds
+        self.backoff_max = 30.0
+        self.recovery_times = collections.deque(maxlen=100)  # seconds from loss to recovery
+
+        # Program pointer runs fast with a queue so quick line changes are not coalesced
+        self.program_pointer_profile = "low_latency"
+        # Positions only feed telemetry: sampled at the slower rate and pushed only on real moves
+        self.position_profile = "normal"
+        self.position_deadband = 1.0  # mm
+
+        self.recorder = None
+        self._state_node = None
+        # Guards client, subscription and state swaps only; network calls are made outside it
+        self._session_lock = threading.RLock()
+        self._stop_supervisor = threading.Event()
+        self._supervisor = None
+
     def connect(self, url):
         """Connect to OPC UA server"""
         try:
-            self.client = Client(url)
-            self.client.application_uri = "urn:universitywest:ABB:PythonClient"
-
+            self.url = url
             self.log_message("Connecting to OPC UA server...")
-            self.client.connect()
+            client, state_node = self._open_session()
+            with self._session_lock:
+                self.client, self._state_node = client, state_node
+                self.is_connected = True
 
-            # Load ABB type definitions for decoding ExtensionObjects
-            self.client.load_type_definitions()
-
-            self.is_connected = True
             self.log_message(" Successfully connected to ABB Robot OPC UA server")
+            self._start_supervisor()
             return True
 
         except Exception as e:
@@ -861,17 +1169,39 @@ class ABBOPCUAConnector:
             self.is_connected = False
             return False
 
+    def _open_session(self):
+        """Create a client, connect and load type definitions; returns (client, server state node)"""
+        client = Client(self.url)
+        client.application_uri = "urn:universitywest:ABB:PythonClient"
+        client.connect()
+
+        try:
+            # Load ABB type definitions for decoding ExtensionObjects, from disk when unchanged
+            start = time.perf_counter()
+            cached = load_type_definitions_cached(client, self.url)
+            logger.info("Type definitions %s in %.0f ms", "loaded from cache" if cached else "generated",
+                        (time.perf_counter() - start) * 1000.0)
+            return client, client.get_node(ua.NodeId(ua.ObjectIds.Server_ServerStatus_State))
+        except Exception:
+            self._close_dead_session(client)
+            raise
+
     def disconnect(self):
         """Disconnect from OPC UA server"""
         try:
+            self._stop_supervisor.set()
             self.stop_monitoring()
 
-            if self.client:
-                self.client.disconnect()
-                self.client = None
+            with self._session_lock:
+                client, self.client = self.client, None
+                self._state_node = None
+            if client:
+                client.disconnect()
 
+            self.stop_recording()
             self.is_connected = False
             self.is_monitoring = False
+            self.handler = None
             self.log_message(" Disconnected from OPC UA server")
 
         except Exception as e:
@@ -894,12 +1224,25 @@ class ABBOPCUAConnector:
             except Exception as e:
                 self.log_message(f"Test read failed: {e}", is_error=True)
 
-            # Create subscription handler
-            self.handler = OPCUASubscriptionHandler(self.gui_app)
-            self.subscription = self.client.create_subscription(500, self.handler)
-            self.subscription.subscribe_data_change(program_point_node)
+            # Create subscription handler; it survives reconnects so its state is kept
+            if self.handler is None:
+                self.handler = OPCUASubscriptionHandler(self.gui_app)
+                self.handler.recorder = self.recorder
+            with self._session_lock:
+                # From here on a recovering supervisor subscribes the new session itself
+                self.is_monitoring = True
+                client = self.client
+            try:
+                subscription = self._create_subscription(client)
+            except Exception:
+                self.is_monitoring = False
+                raise
+            with self._session_lock:
+                if self.client is client and self.subscription is None:
+                    self.subscription, subscription = subscription, None
+            if subscription is not None:
+                subscription.delete()  # the session was replaced meanwhile and already subscribed
 
-            self.is_monitoring = True
             self.log_message("📡 Started monitoring program execution")
             return True
 
@@ -907,19 +1250,178 @@ class ABBOPCUAConnector:
             self.log_message(f"Failed to start monitoring: {e}", is_error=True)
             return False
 
+    def _create_subscription(self, client):
+        """Subscribe the existing handler to the program pointer on a session; returns the subscription"""
+        profile = get_profile(self.program_pointer_profile)
+        self.handler.decoder.reset()  # payload layout is re-detected per session
+        subscription = client.create_subscription(profile["publishing_interval"], self.handler)
+        program_point_node = client.get_node(PROGRAM_POINT_NODE_ID)
+        result = subscription.create_monitored_items([make_monitored_item(1, program_point_node.nodeid, profile)])
+        if isinstance(result[0], ua.StatusCode):
+            raise RuntimeError(f"Program pointer subscription rejected: {result[0]}")
+
+        # Positions only feed telemetry, so a gateway without them still monitors the program. They
+        # share the subscription but sample at the position profile's rate with its queue size.
+        deadband = ua.DataChangeFilter()
+        deadband.Trigger = ua.DataChangeTrigger.StatusValue
+        deadband.DeadbandType = ua.DeadbandType.Absolute
+        deadband.DeadbandValue = float(self.position_deadband)
+        rejected = self._subscribe_positions(client, subscription, POSITION_HANDLES, deadband)
+        if rejected:
+            # Server does not support deadband filters - every sampled change is pushed instead
+            logger.warning("Deadband filter rejected for positions %s",
+                           ", ".join(axis for axis, _ in rejected.values()))
+            retry = {handle: axis for handle, (axis, _) in rejected.items()}
+            for axis, status in self._subscribe_positions(client, subscription, retry).values():
+                logger.warning("Position %s subscription rejected: %s", axis, status)
+        return subscription
+
+    def _subscribe_positions(self, client, subscription, handles, mfilter=None):
+        """Add the axis items in one request; returns {handle: (axis, status)} of those the server rejected"""
+        profile = get_profile(self.position_profile)
+        items = [make_monitored_item(handle, client.get_node(GVL_STATION_NODE_IDS[f"current_{axis}"]).nodeid,
+                                     profile, mfilter=mfilter) for handle, axis in handles.items()]
+        results = subscription.create_monitored_items(items)
+        return {handle: (axis, result) for (handle, axis), result in zip(handles.items(), results)
+                if isinstance(result, ua.StatusCode)}
+
+    def replay_handles(self):
+        """Node id -> client handle map to pass to NotificationReplayer, matching _create_subscription"""
+        handles = {PROGRAM_POINT_NODE_ID: 1}
+        for handle, axis in POSITION_HANDLES.items():
+            handles[GVL_STATION_NODE_IDS[f"current_{axis}"]] = handle
+        return handles
+
     def stop_monitoring(self):
         """Stop monitoring"""
         try:
-            if self.subscription:
-                self.subscription.delete()
-                self.subscription = None
+            with self._session_lock:
+                subscription, self.subscription = self.subscription, None
+                self.is_monitoring = False
+            if subscription:
+                subscription.delete()
 
-            self.is_monitoring = False
             self.log_message("⏹️ Stopped program monitoring")
 
         except Exception as e:
             self.log_message(f"Error stopping monitoring: {e}", is_error=True)
 
+    def start_recording(self, path):
+        """Record every program pointer notification to a binary log for offline replay"""
+        self.stop_recording()
+        self.recorder = NotificationRecorder(path)
+        if self.handler:
+            self.handler.recorder = self.recorder
+        self.log_message(f"Recording notifications to {path}")
+
+    def stop_recording(self):
+        """Stop recording and close the log"""
+        if self.recorder is None:
+            return
+        if self.handler:
+            self.handler.recorder = None
+        self.recorder.close()
+        self.log_message(f"Recorded {self.recorder.records} notifications to {self.recorder.path}")
+        self.recorder = None
+
+    def _start_supervisor(self):
+        """Start the keepalive thread for this session"""
+        self._stop_supervisor.clear()
+        if self._supervisor is None or not self._supervisor.is_alive():
+            self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+            self._supervisor.start()
+
+    def _supervise(self):
+        """Detect keepalive loss and recover the session"""
+        while not self._stop_supervisor.wait(self.keepalive_interval):
+            try:
+                with self._session_lock:
+                    state_node = self._state_node
+                if state_node is None:
+                    raise RuntimeError("no session")
+                state_node.get_value()
+            except Exception as e:
+                if self._stop_supervisor.is_set():
+                    break
+                if self.auto_reconnect:
+                    self._recover(e)
+                else:
+                    self.is_connected = False
+                    self.log_message(f"Connection lost: {e}", is_error=True)
+                    break
+
+    def _recover(self, error):
+        """Reconnect with exponential backoff and jitter, then re-create the subscription"""
+        lost_at = time.time()
+        with self._session_lock:
+            dead_client, self.client = self.client, None
+            self._state_node = None
+            self.subscription = None
+            self.is_connected = False
+        self.log_message(f"Connection lost ({error}) - reconnecting", is_error=True)
+        self.message_callback("connection", "lost")
+        self._close_dead_session(dead_client)
+
+        delay = self.backoff_initial
+        attempt = 0
+        while not self._stop_supervisor.is_set():
+            attempt += 1
+            try:
+                client, state_node = self._open_session()
+                try:
+                    subscription = self._create_subscription(client) if self.is_monitoring else None
+                except Exception:
+                    self._close_dead_session(client)
+                    raise
+
+                with self._session_lock:
+                    # disconnect() or stop_monitoring() may have run while we were connecting
+                    stopped = self._stop_supervisor.is_set()
+                    if not stopped:
+                        self.client, self._state_node = client, state_node
+                        self.is_connected = True
+                        if self.is_monitoring:
+                            self.subscription, subscription = subscription, None
+                if stopped:
+                    self._close_dead_session(client)
+                    return
+                if subscription is not None:
+                    subscription.delete()
+
+                recovery_time = time.time() - lost_at
+                self.recovery_times.append(recovery_time)
+                self.log_message(f"Reconnected after {recovery_time:.1f}s ({attempt} attempts)")
+                self.message_callback("connection", "recovered")
+                return
+
+            except Exception as e:
+                logger.warning("Reconnect attempt %d failed: %s", attempt, e)
+                # Full jitter keeps many monitors from retrying a restarted gateway in lockstep
+                if self._stop_supervisor.wait(random.uniform(0, delay)):
+                    return
+                delay = min(delay * 2, self.backoff_max)
+
+    @staticmethod
+    def _close_dead_session(client):
+        """Drop a client without waiting on a server that is gone"""
+        if client:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+    def get_recovery_stats(self):
+        """Get time-to-recover of past reconnects in seconds"""
+        if not self.recovery_times:
+            return None
+        times = list(self.recovery_times)
+        return {
+            'count': len(times),
+            'last_s': times[-1],
+            'avg_s': sum(times) / len(times),
+            'max_s': max(times)
+        }
+
     def get_robot_status(self):
         """Get current robot status"""
         if not self.is_connected:
@@ -932,7 +1434,8 @@ class ABBOPCUAConnector:
             status_info = {
                 'connected': True,
                 'monitoring': self.is_monitoring,
-                'program_point': str(value)
+                'program_point': str(value),
+                'recoveries': self.get_recovery_stats()
             }
 
             # Try to extract detailed info
@@ -1143,9 +1646,17 @@ class RobotSimulationWindow:
         self.last_line_displayed = None
         self.gui_app = self  # Add this reference for OPCUA handler
 
+        # Work handed over from other threads; deque append/popleft need no lock
+        self.ui_events = collections.deque()
+        self.cycle_analytics = CycleAnalytics()  # fed by the subscription handler, drained on the UI tick
+        self.telemetry = self._open_telemetry()
+        self.position_buffer = self._open_position_buffer()  # recent samples for the motion display
+        self.position_sampler = PositionSampler([self._on_position_sample])  # fed by the subscription handler
+        self.analytics_shown_at = 0.0
+
         # Initialize message queue manager
         self.message_queue_manager = MessageQueueManager(
-            display_callback=self.display_messages,
+            display_callback=self._post_display,
             speech_callback=tts_manager.speak_text
         )
 
@@ -1167,9 +1678,40 @@ class RobotSimulationWindow:
         # Setup UI
         self.setup_ui()
 
+        # Ctrl+T saves the trace buffer (enable tracing with ABB_TRACE=debug)
+        self.window.bind("<Control-t>", self.dump_trace)
+
+        self.program_version = message_tables.version
+        self.window.after(UI_TICK_MS, self._ui_tick)
+
         # Center the window
         self.center_window()
 
+    def _open_telemetry(self):
+        """Telemetry store for pointer and position history, or None if it can't be used here"""
+        try:
+            store = TelemetryStore()
+        except (RuntimeError, OSError) as e:
+            tracer.trace(ERROR, "telemetry", "Telemetry recording disabled: %s", e)
+            return None
+        atexit.register(store.close)
+        return store
+
+    def _open_position_buffer(self):
+        """Ring buffer for live kinematics, or None without NumPy"""
+        try:
+            return PositionRingBuffer()
+        except RuntimeError as e:
+            tracer.trace(ERROR, "kinematics", "Motion display disabled: %s", e)
+            return None
+
+    def _on_position_sample(self, timestamp, x, y, z):
+        """Keep a merged position sample; runs on the OPC UA thread"""
+        if self.telemetry is not None:
+            self.telemetry.record_position(x, y, z, timestamp)
+        if self.position_buffer is not None:
+            self.position_buffer.append(timestamp, x, y, z)
+
     def center_window(self):
         """Center the window on screen"""
         self.window.update_idletasks()
@@ -1362,6 +1904,34 @@ class RobotSimulationWindow:
                                    font=("Arial", 9, "bold"), fg='#e74c3c', bg='#34495e')
         self.line_label.pack(side='left', padx=(5, 0))
 
+        # Separator
+        tk.Label(status_container, text="|", font=("Arial", 9),
+                 fg='#7f8c8d', bg='#34495e').pack(side='left', padx=15)
+
+        # Throughput Display
+        throughput_frame = tk.Frame(status_container, bg='#34495e')
+        throughput_frame.pack(side='left', padx=15)
+
+        tk.Label(throughput_frame, text="Throughput:", font=("Arial", 9),
+                 fg='#bdc3c7', bg='#34495e').pack(side='left')
+        self.throughput_label = tk.Label(throughput_frame, text="--- parts/h | p95 cycle ---",
+                                         font=("Arial", 9, "bold"), fg='#f39c12', bg='#34495e')
+        self.throughput_label.pack(side='left', padx=(5, 0))
+
+        # Separator
+        tk.Label(status_container, text="|", font=("Arial", 9),
+                 fg='#7f8c8d', bg='#34495e').pack(side='left', padx=15)
+
+        # Motion Display
+        motion_frame = tk.Frame(status_container, bg='#34495e')
+        motion_frame.pack(side='left', padx=15)
+
+        tk.Label(motion_frame, text=f"Motion ({MOTION_WINDOW_SECONDS:.0f}s):", font=("Arial", 9),
+                 fg='#bdc3c7', bg='#34495e').pack(side='left')
+        self.motion_label = tk.Label(motion_frame, text="--- mm | peak --- | idle ---",
+                                     font=("Arial", 9, "bold"), fg='#1abc9c', bg='#34495e')
+        self.motion_label.pack(side='left', padx=(5, 0))
+
     def setup_realtime_execution_display(self, parent):
         """Setup the real-time execution display"""
         # Status frame
@@ -1388,6 +1958,7 @@ class RobotSimulationWindow:
 
         # Configure tags for execution text
         self.execution_text.tag_configure("execution_time", foreground="#7f8c8d")
+        self.execution_log = BoundedLogView(self.execution_text, EXECUTION_LOG_MAX_LINES, EXECUTION_LOG_TRIM)
 
     def setup_ai_messages_display(self, parent):
         """Setup the AI messages display area"""
@@ -1463,8 +2034,12 @@ class RobotSimulationWindow:
         self.ai_message_display.config(state=tk.DISABLED)
 
         # Update queue status
-        queue_size = len(self.message_queue_manager.message_queue)
-        self.queue_status.config(text=f"Messages in queue: {queue_size}")
+        queue_size = self.message_queue_manager.depth()
+        oldest = self.message_queue_manager.oldest_age()
+        age_text = f" (oldest {oldest:.0f}s)" if queue_size else ""
+        speech_wait = tts_manager.get_speech_stats()['latency_p50_ms']
+        speech_text = f" | Speech wait: {speech_wait:.0f} ms" if speech_wait is not None else ""
+        self.queue_status.config(text=f"Messages in queue: {queue_size}{age_text}{speech_text}")
 
     def toggle_speech(self, event=None):
         """Toggle text-to-speech on/off"""
@@ -1485,24 +2060,14 @@ class RobotSimulationWindow:
             return str(text)
         return text.encode('ascii', 'ignore').decode('ascii')
 
-    def add_ai_message(self, message):
+    def add_ai_message(self, message, priority=PRIORITY_INFO):
         """Add an AI-generated message to the queue"""
         safe_message = self.clean_unicode_chars(message)
-        self.message_queue_manager.add_message(safe_message)
+        self.message_queue_manager.add_message(safe_message, priority)
 
     def add_execution_message(self, message):
-        """Add execution message to real-time display"""
-        safe_message = self.clean_unicode_chars(message)
-
-        self.execution_text.config(state=tk.NORMAL)
-
-        # Add timestamp
-        timestamp = time.strftime("%H:%M:%S")
-        self.execution_text.insert(tk.END, f"[{timestamp}] ", "execution_time")
-
-        self.execution_text.insert(tk.END, f"{safe_message}\n")
-        self.execution_text.see(tk.END)
-        self.execution_text.config(state=tk.DISABLED)
+        """Add execution message to real-time display; written on the next UI tick"""
+        self.execution_log.append(self.clean_unicode_chars(message))
 
     def connect_opcua(self):
         """Connect to ABB Robot OPC UA server"""
@@ -1534,14 +2099,14 @@ class RobotSimulationWindow:
             self.monitor_btn.config(state=tk.NORMAL)
             self.status_btn.config(state=tk.NORMAL)
             self.connect_btn.config(text="Disconnect", bg='#e74c3c', command=self.disconnect_opcua)
-            self.add_ai_message("Successfully connected to ABB Robot via OPC UA")
+            self.add_ai_message("Successfully connected to ABB Robot via OPC UA", PRIORITY_STATUS)
             self.add_execution_message("OPC UA Connection Established - Ready to monitor robot execution")
             self.sim_status_label.config(text="Connected to robot - Ready for real-time monitoring")
         else:
             self.opcua_status.config(text="Connection failed", fg='#e74c3c')
             self.connection_indicator.config(fg='#e74c3c')  # Red for failed
             self.connect_btn.config(state=tk.NORMAL)
-            self.add_ai_message("Failed to connect to ABB Robot")
+            self.add_ai_message("Failed to connect to ABB Robot", PRIORITY_ALARM)
 
     def disconnect_opcua(self):
         """Disconnect from OPC UA server"""
@@ -1551,7 +2116,7 @@ class RobotSimulationWindow:
         self.connect_btn.config(text="Connect to Robot", bg='#27ae60', command=self.connect_opcua)
         self.monitor_btn.config(state=tk.DISABLED, text="Start Monitoring", bg='#3498db')
         self.status_btn.config(state=tk.DISABLED)
-        self.add_ai_message(" Disconnected from ABB Robot")
+        self.add_ai_message(" Disconnected from ABB Robot", PRIORITY_STATUS)
         self.add_execution_message("OPC UA Connection Closed")
         self.sim_status_label.config(text="Disconnected from robot")
 
@@ -1583,17 +2148,103 @@ class RobotSimulationWindow:
                 self.add_ai_message(
                     f" Current Line: {status.get('line', 'N/A')}, Module: {status.get('module', 'N/A')}, Routine: {status.get('routine', 'N/A')}")
 
+    def post_ui_event(self, *event):
+        """Queue work for the Tk thread; safe to call from any thread"""
+        self.ui_events.append(event)
+
+    def _ui_tick(self):
+        """Apply queued events, then schedule the next tick"""
+        if not self.window.winfo_exists():
+            return
+        self._process_ui_events()
+        if self.program_version != message_tables.version:
+            self.program_version = message_tables.version
+            self.add_execution_message(f"Robot program reloaded - {len(message_tables.tables.actions)} "
+                                       f"narrated lines, messages updated")
+        self.execution_log.flush()
+        self.cycle_analytics.drain()
+        if time.monotonic() - self.analytics_shown_at >= 1.0:
+            self._update_analytics_display()
+        self.window.after(UI_TICK_MS, self._ui_tick)
+
+    def _update_analytics_display(self):
+        """Show parts/hour and p95 cycle time"""
+        self.analytics_shown_at = time.monotonic()
+        rate = self.cycle_analytics.parts_per_hour()
+        p95 = self.cycle_analytics.cycles.p95.value()
+        rate_text = "---" if rate is None else f"{rate:.0f}"
+        p95_text = "---" if p95 is None else f"{p95:.1f} s"
+        self.throughput_label.config(text=f"{rate_text} parts/h | p95 cycle {p95_text}")
+        self._update_motion_display()
+
+    def _update_motion_display(self):
+        """Show path length, peak speed and idle time over the last MOTION_WINDOW_SECONDS"""
+        if self.position_buffer is None or self.position_buffer.count < 2:
+            return
+        # Positions only arrive on moves, so the robot is still where the newest sample left it
+        summary = self.position_buffer.analyse(MOTION_WINDOW_SECONDS, until=time.time()).summary()
+        peak = summary['max_speed']
+        peak_text = "---" if peak is None else f"{peak:.0f} mm/s"
+        self.motion_label.config(text=f"{summary['path_length']:.0f} mm | peak {peak_text} | "
+                                      f"idle {summary['idle_seconds']:.1f} s")
+
+    def _process_ui_events(self):
+        """Apply up to UI_EVENT_BATCH queued events, oldest first"""
+        events = self.ui_events
+        for _ in range(UI_EVENT_BATCH):
+            if not events:
+                break
+            try:
+                self._dispatch_ui_event(events.popleft())
+            except Exception as e:
+                tracer.trace(ERROR, "ui", "Error applying UI event: %s", e)
+
+    def _dispatch_ui_event(self, event):
+        kind = event[0]
+        if kind == "log":
+            self._log_message_now(event[1], event[2])
+        elif kind == "status":
+            self._update_status_display(event[1], event[2], event[3])
+        elif kind == "display":
+            self.display_messages(event[1])
+        elif kind == "connector":
+            self._handle_opcua_message_now(event[1], event[2])
+
+    def _post_display(self, messages):
+        """Display callback for MessageQueueManager, which also runs on timer threads"""
+        self.post_ui_event("display", list(messages))
+
     def handle_opcua_message(self, category, data):
-        """Handle messages from OPC UA connector"""
+        """Handle messages from OPC UA connector; called from its threads"""
+        self.post_ui_event("connector", category, data)
+
+    def _handle_opcua_message_now(self, category, data):
         if category == "system":
-            self.add_ai_message(f" {data}")
+            self.add_ai_message(f" {data}", PRIORITY_STATUS)
         elif category == "error":
-            self.add_ai_message(f" {data}")
+            self.add_ai_message(f" {data}", PRIORITY_ALARM)
+        elif category == "connection":
+            # Reported from the connector's supervisor thread
+            self._update_link_state(data)
+
+    def _update_link_state(self, state):
+        """Show session loss and recovery in the connection indicator"""
+        if state == "lost":
+            self.opcua_status.config(text="Reconnecting...", fg='#f39c12')
+            self.connection_indicator.config(fg='#f39c12')
+            self.add_execution_message("OPC UA connection lost - reconnecting")
+        else:
+            self.opcua_status.config(text="Connected", fg='#27ae60')
+            self.connection_indicator.config(fg='#27ae60')
+            self.add_execution_message("OPC UA connection recovered - monitoring resumed")
 
     def log_opcua_message(self, message, is_error=False):
-        """Log OPC UA messages"""
+        """Log OPC UA messages; called from the subscription thread"""
+        self.post_ui_event("log", message, is_error)
+
+    def _log_message_now(self, message, is_error):
         if is_error:
-            self.add_ai_message(f"{message}")
+            self.add_ai_message(f"{message}", PRIORITY_ALARM)
             self.add_execution_message(f"ERROR: {message}")
         else:
             # Remove OPC UA prefix and send clean message
@@ -1603,7 +2254,7 @@ class RobotSimulationWindow:
 
     def update_robot_status(self, module, routine, line):
         """Update robot program status in UI"""
-        self.window.after(0, self._update_status_display, module, routine, line)
+        self.post_ui_event("status", module, routine, line)
 
     def _update_status_display(self, module, routine, line):
         """Update status display in main thread"""
@@ -1616,6 +2267,17 @@ class RobotSimulationWindow:
             self.add_execution_message(f"Program Pointer: Module={module}, Routine={routine}, Line={line}")
             self.last_line_displayed = line
 
+    def dump_trace(self, event=None):
+        """Save the in-memory trace buffer to a file"""
+        if not tracer.level:
+            self.add_execution_message("Tracing is off - start with ABB_TRACE=debug to record traces")
+            return
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".log",
+                                            initialfile=time.strftime("trace_%Y%m%d_%H%M%S.log"))
+        if path:
+            count = tracer.dump(path)
+            self.add_execution_message(f"Saved {count} trace records to {path}")
+
     def test_speech(self):
         """Test speech functionality"""
         tts_manager.test_speech()
@@ -1623,6 +2285,12 @@ class RobotSimulationWindow:
 
 # Create the main window
 if __name__ == "__main__":
+    start_services()
     root = tk.Tk()
+    # Render any catalogue phrases missing from the audio cache while the operator logs in
+    tts_manager.build_audio_cache(wait=False)
+    # Pick up edits to the RAPID program without restarting or reconnecting; when the built-in
+    # tables are in use (program_tables is None) the first good save of the file replaces them
+    program_watcher.start(program_tables)
     app = LoginSystem(root)
     root.mainloop()
\ No newline at end of file
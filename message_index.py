@@ -0,0 +1,153 @@
+"""Compiled line-to-message index for one operator level.
+
+The source tables (per-line actions, movement groups and their consolidated messages, silent
+lines) are resolved once per level into a flat list indexed by program line, so classifying a
+notification is a single list lookup. Publishing new tables bumps a version number; holders of
+a compiled index compare it on each use and recompile when it has moved on.
+
+CycleTracker follows the program pointer through pick/place cycles, so each movement group's
+consolidated message is spoken once per cycle rather than once per session.
+"""
+import threading
+
+SILENT = "silent"  # entry for lines that never produce a message
+
+# Cycle boundary events returned by CycleTracker.step
+CYCLE_START = "cycle_start"
+CYCLE_END = "cycle_end"
+
+
+class MessageIndex:
+    """Line number -> SILENT, None, or (group id, group message, line message) for one level"""
+
+    __slots__ = ("version", "user_level", "entries", "group_names", "cycle_start", "cycle_end")
+
+    def __init__(self, tables, user_level):
+        self.version = tables.version
+        self.user_level = user_level
+        self.group_names = list(tables.group_messages)
+        self.cycle_start = tables.cycle_start
+        self.cycle_end = tables.cycle_end
+
+        lines = set(tables.actions) | set(tables.silent_lines)
+        for group_lines in tables.movement_groups.values():
+            lines.update(group_lines)
+        entries = [None] * (max(lines) + 1 if lines else 0)
+
+        for line, messages in tables.actions.items():
+            entries[line] = (None, None, messages.get(user_level, f"Line {line}"))
+        for group_id, group_name in enumerate(self.group_names):
+            messages = tables.group_messages[group_name]
+            group_message = messages.get(user_level, messages["level3"])
+            for line in tables.movement_groups.get(group_name, ()):
+                # The first group listing a line wins, as the old linear scan did
+                if entries[line] is None or entries[line][0] is None:
+                    line_message = entries[line][2] if entries[line] else None
+                    entries[line] = (group_id, group_message, line_message)
+        for line in tables.silent_lines:
+            entries[line] = SILENT
+        self.entries = entries
+
+    def lookup(self, line):
+        if 0 <= line < len(self.entries):
+            return self.entries[line]
+        return None
+
+
+class CycleTracker:
+    """Movement group state for one program pointer stream, reset at every cycle boundary.
+
+    A cycle starts when the pointer reaches the index's cycle_start line (the home move at the
+    top of the main loop). Each group remembers the cycle it last spoke in, so a new cycle makes
+    every group speak again without clearing anything. Without known boundaries a group speaks
+    whenever the pointer enters it from outside.
+    """
+
+    __slots__ = ("cycle", "in_cycle", "group_cycles", "last_group")
+
+    def __init__(self, group_count=0):
+        self.cycle = 0
+        self.in_cycle = False
+        self.group_cycles = [-1] * group_count  # group id -> cycle it last spoke in
+        self.last_group = None
+
+    def step(self, index, line, group_id):
+        """Advance to a new line; returns (event, speak): CYCLE_START, CYCLE_END or None, and whether the group should speak"""
+        event = None
+        if line == index.cycle_start:
+            self.cycle += 1
+            self.in_cycle = True
+            event = CYCLE_START
+        elif line == index.cycle_end and self.in_cycle:
+            self.in_cycle = False
+            event = CYCLE_END
+
+        speak = False
+        if group_id is not None:
+            if index.cycle_start is None:
+                speak = group_id != self.last_group
+            else:
+                speak = self.group_cycles[group_id] != self.cycle
+                self.group_cycles[group_id] = self.cycle
+        self.last_group = group_id
+        return event, speak
+
+    def remap(self, old_index, new_index):
+        """Carry group state over to a recompiled index, matching groups by name"""
+        spoken = {}
+        if old_index is not None:
+            spoken = {name: self.group_cycles[group_id] for group_id, name in enumerate(old_index.group_names)
+                      if group_id < len(self.group_cycles)}
+            if self.last_group is not None and self.last_group < len(old_index.group_names):
+                last_name = old_index.group_names[self.last_group]
+                self.last_group = next((group_id for group_id, name in enumerate(new_index.group_names)
+                                        if name == last_name), None)
+        self.group_cycles = [spoken.get(name, -1) for name in new_index.group_names]
+
+
+class MessageTables:
+    """One published set of source tables"""
+
+    __slots__ = ("actions", "movement_groups", "group_messages", "silent_lines", "cycle_start", "cycle_end",
+                 "version")
+
+    def __init__(self, actions, movement_groups, group_messages, silent_lines, version, cycle_start=None,
+                 cycle_end=None):
+        self.actions = actions
+        self.movement_groups = movement_groups
+        self.group_messages = group_messages
+        self.silent_lines = silent_lines
+        self.cycle_start = cycle_start  # first line of each pick/place cycle
+        self.cycle_end = cycle_end  # last line of a cycle
+        self.version = version
+
+
+class MessageTableRegistry:
+    """Current source tables plus the indexes compiled from them, one per user level"""
+
+    def __init__(self):
+        self.tables = MessageTables({}, {}, {}, set(), 0)
+        self.version = 0
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def publish(self, actions, movement_groups, group_messages, silent_lines, cycle_start=None, cycle_end=None):
+        """Replace the source tables; existing indexes go stale and are rebuilt on next use"""
+        with self._lock:
+            self.tables = MessageTables(actions, movement_groups, group_messages, set(silent_lines),
+                                        self.version + 1, cycle_start, cycle_end)
+            self._compiled = {}
+            self.version = self.tables.version
+
+    def compile(self, user_level):
+        """Index for user_level against the current tables, compiled at most once per version"""
+        user_level = user_level.lower()
+        with self._lock:
+            index = self._compiled.get(user_level)
+            if index is None or index.version != self.version:
+                index = self._compiled[user_level] = MessageIndex(self.tables, user_level)
+            return index
+
+
+# Shared by the subscription handlers; main.py publishes its tables at import
+message_tables = MessageTableRegistry()
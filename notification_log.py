@@ -0,0 +1,204 @@
+"""Record raw OPC UA notifications to a compact binary log and replay them into the handlers offline.
+
+    python notification_log.py info shift.rec
+"""
+import ast
+import collections
+import logging
+import queue
+import struct
+import sys
+import threading
+import time
+
+try:
+    from opcua import ua
+    from opcua.ua.ua_binary import variant_to_binary, variant_from_binary
+    from opcua.common.utils import Buffer
+except ImportError:
+    ua = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ABBNREC1"
+NODE_RECORD = b"N"
+VALUE_RECORD = b"V"
+NODE_HEADER = struct.Struct("<HH")  # node index, node id length
+VALUE_HEADER = struct.Struct("<dHBI")  # receive time, node index, encoding, payload length
+
+ENCODING_VARIANT = 0  # OPC UA binary Variant
+ENCODING_TEXT = 1  # repr() of a value the binary encoder could not handle
+
+ReplayNode = collections.namedtuple('ReplayNode', ['nodeid'])
+ReplayMonitoredItem = collections.namedtuple('ReplayMonitoredItem', ['ClientHandle', 'Value'])
+ReplayDataValue = collections.namedtuple('ReplayDataValue', ['Value', 'SourceTimestamp'])
+
+
+class ReplayData:
+    """Minimal stand-in for the opcua DataChangeNotif passed to datachange_notification"""
+
+    __slots__ = ('monitored_item',)
+
+    def __init__(self, monitored_item):
+        self.monitored_item = monitored_item
+
+
+class NotificationRecorder:
+    """Appends every notification to a binary log; encoding and disk writes run on a background thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.node_indexes = {}  # node id string -> index in the log
+        self.records = 0
+        self.pending = queue.Queue()
+        self.closed = False
+        self.lock = threading.Lock()  # orders record() against the close sentinel
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def record(self, node, val):
+        """Queue a notification; called on the subscription thread, so it only timestamps and enqueues.
+        Notifications arriving once close() has started are dropped."""
+        with self.lock:
+            if not self.closed:
+                self.pending.put((time.time(), node, val))
+
+    def close(self):
+        """Write everything still queued and close the log"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.pending.put(None)
+        self.writer.join()
+        self.file.close()
+
+    def _write_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            self._write(*item)
+            if self.pending.empty():
+                self.file.flush()
+
+    def _write(self, timestamp, node, val):
+        node_id = node.nodeid.to_string() if hasattr(node.nodeid, "to_string") else str(node.nodeid)
+        index = self.node_indexes.get(node_id)
+        if index is None:
+            index = self.node_indexes[node_id] = len(self.node_indexes)
+            encoded_id = node_id.encode("utf-8")
+            self.file.write(NODE_RECORD + NODE_HEADER.pack(index, len(encoded_id)) + encoded_id)
+
+        encoding, payload = encode_value(val)
+        self.file.write(VALUE_RECORD + VALUE_HEADER.pack(timestamp, index, encoding, len(payload)) + payload)
+        self.records += 1
+
+
+def encode_value(val):
+    """Encode as an OPC UA Variant, or as text if the value has no binary encoding"""
+    if ua is not None:
+        try:
+            return ENCODING_VARIANT, variant_to_binary(ua.Variant(val))
+        except Exception:
+            pass
+    return ENCODING_TEXT, repr(val).encode("utf-8")
+
+
+def decode_value(encoding, payload):
+    if encoding == ENCODING_VARIANT:
+        if ua is None:
+            raise RuntimeError("opcua library needed to decode binary values. Install with: pip install opcua")
+        return variant_from_binary(Buffer(payload)).Value
+    text = payload.decode("utf-8")
+    try:
+        return ast.literal_eval(text)  # plain numbers, strings and bools round-trip
+    except (ValueError, SyntaxError):
+        return text
+
+
+def read_records(path):
+    """Yield (receive time, node id, value) for every notification in a log.
+
+    A log cut short, e.g. by a crash while recording, ends at the last complete record.
+    """
+    nodes = {}
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a notification log")
+        while True:
+            kind = f.read(1)
+            if not kind:
+                return
+            if kind == NODE_RECORD:
+                header = f.read(NODE_HEADER.size)
+                if len(header) == NODE_HEADER.size:
+                    index, length = NODE_HEADER.unpack(header)
+                    encoded_id = f.read(length)
+                    if len(encoded_id) == length:
+                        nodes[index] = encoded_id.decode("utf-8")
+                        continue
+            elif kind == VALUE_RECORD:
+                header = f.read(VALUE_HEADER.size)
+                if len(header) == VALUE_HEADER.size:
+                    timestamp, index, encoding, length = VALUE_HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) == length:
+                        yield timestamp, nodes[index], decode_value(encoding, payload)
+                        continue
+            else:
+                raise ValueError(f"Corrupt record type {kind!r} in {path}")
+            logger.warning("%s is truncated; stopping at byte %d", path, f.tell())
+            return
+
+
+class NotificationReplayer:
+    """Drives datachange_notification handlers from a log at 1x, Nx or maximum speed"""
+
+    def __init__(self, path, speed=1.0, client_handles=None, type_definitions=None):
+        self.path = path
+        self.speed = speed  # 0 or None replays as fast as possible
+        self.client_handles = client_handles or {}  # node id -> client handle for handle-indexed handlers
+        if type_definitions:
+            # Decoders for the ABB structures, e.g. a file from type_cache
+            from type_cache import load_cached_type_definitions
+            load_cached_type_definitions(type_definitions)
+
+    def replay(self, handler):
+        """Feed every recorded notification to handler; returns the number replayed"""
+        first = None
+        wall_start = time.perf_counter()
+        count = 0
+        for timestamp, node_id, value in read_records(self.path):
+            if first is None:
+                first = timestamp
+            if self.speed:
+                delay = (timestamp - first) / self.speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            item = ReplayMonitoredItem(self.client_handles.get(node_id), ReplayDataValue(value, None))
+            handler.datachange_notification(ReplayNode(node_id), value, ReplayData(item))
+            count += 1
+        return count
+
+
+def _print_info(path):
+    counts = collections.Counter()
+    first = last = None
+    for timestamp, node_id, _ in read_records(path):
+        counts[node_id] += 1
+        first = timestamp if first is None else first
+        last = timestamp
+    print(f"{sum(counts.values())} notifications over {(last or 0) - (first or 0):.1f}s")
+    for node_id, count in counts.most_common():
+        print(f"{count:>10}  {node_id}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "info":
+        print(__doc__)
+        sys.exit(1)
+    _print_info(sys.argv[2])
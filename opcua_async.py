@@ -0,0 +1,182 @@
+import asyncio
+import time
+from datetime import timezone
+
+try:
+    from asyncua import Client
+except ImportError:
+    print("asyncua library not installed. Install with: pip install asyncua")
+    Client = None
+
+
+class _DataChangeRelay:
+    """Forwards asyncua notifications of one session to its connector"""
+
+    def __init__(self, connector):
+        self.connector = connector
+
+    def datachange_notification(self, node, val, data):
+        self.connector._on_data_change(node, val, data)
+
+    def status_change_notification(self, status):
+        # asyncua passes the StatusChangeNotification, older versions the StatusCode itself
+        code = getattr(status, "Status", status)
+        is_good = code.is_good() if hasattr(code, "is_good") else False
+        self.connector.log_message(f"Subscription status changed: {status}", is_error=not is_good)
+
+
+class AsyncABBOPCUAConnector:
+    """One OPC UA session to an ABB IoT Gateway, driven by an asyncio event loop"""
+
+    def __init__(self, robot_name, endpoint_url, node_ids, data_callback, message_callback=None,
+                 publishing_interval=500):
+        self.robot_name = robot_name
+        self.endpoint_url = endpoint_url
+        self.node_ids = node_ids  # signal name -> node id string
+        self.data_callback = data_callback  # (robot_name, signal_name, value, timestamp)
+        self.message_callback = message_callback
+        self.publishing_interval = publishing_interval
+        self.client = None
+        self.subscription = None
+        self.names_by_nodeid = {}  # NodeId -> signal name
+        self.is_connected = False
+        self.is_monitoring = False
+
+    async def connect(self):
+        """Connect to the OPC UA server"""
+        if Client is None:
+            self.log_message("asyncua library not available. Install with: pip install asyncua", is_error=True)
+            return False
+
+        try:
+            self.client = Client(self.endpoint_url)
+            self.client.application_uri = "urn:universitywest:ABB:PythonClient"
+            await self.client.connect()
+
+            # Load ABB type definitions for decoding ExtensionObjects
+            await self.client.load_data_type_definitions()
+
+            self.is_connected = True
+            self.log_message(f"Connected to {self.endpoint_url}")
+            return True
+
+        except Exception as e:
+            self.log_message(f"Connection failed: {e}", is_error=True)
+            self.client = None
+            self.is_connected = False
+            return False
+
+    async def disconnect(self):
+        """Disconnect from the OPC UA server"""
+        try:
+            await self.stop_monitoring()
+            if self.client:
+                await self.client.disconnect()
+                self.client = None
+        except Exception as e:
+            self.log_message(f"Error during disconnect: {e}", is_error=True)
+        finally:
+            self.is_connected = False
+
+    async def start_monitoring(self):
+        """Subscribe to every configured node on this session"""
+        if not self.is_connected:
+            self.log_message("Not connected to server", is_error=True)
+            return False
+
+        try:
+            nodes = []
+            for name, node_id in self.node_ids.items():
+                node = self.client.get_node(node_id)
+                self.names_by_nodeid[node.nodeid] = name
+                nodes.append(node)
+
+            self.subscription = await self.client.create_subscription(self.publishing_interval,
+                                                                      _DataChangeRelay(self))
+            await self.subscription.subscribe_data_change(nodes)
+
+            self.is_monitoring = True
+            self.log_message(f"Monitoring {len(nodes)} signals")
+            return True
+
+        except Exception as e:
+            self.log_message(f"Failed to start monitoring: {e}", is_error=True)
+            return False
+
+    async def stop_monitoring(self):
+        """Delete the subscription"""
+        if self.subscription:
+            try:
+                await self.subscription.delete()
+            except Exception as e:
+                self.log_message(f"Error stopping monitoring: {e}", is_error=True)
+            self.subscription = None
+        self.is_monitoring = False
+
+    def _on_data_change(self, node, val, data):
+        """Resolve the signal name and hand the value to the data callback"""
+        name = self.names_by_nodeid.get(node.nodeid)
+        if name is None:
+            return
+        try:
+            self.data_callback(self.robot_name, name, val, self._source_time(data))
+        except Exception as e:
+            self.log_message(f"Data callback error: {e}", is_error=True)
+
+    @staticmethod
+    def _source_time(data):
+        """Server source timestamp of a notification as epoch seconds, falling back to local time"""
+        try:
+            source = data.monitored_item.Value.SourceTimestamp
+        except AttributeError:
+            source = None
+        if source is None:
+            return time.time()
+        if source.tzinfo is None:
+            source = source.replace(tzinfo=timezone.utc)  # OPC UA timestamps are UTC
+        return source.timestamp()
+
+    def log_message(self, message, is_error=False):
+        """Log message through callback"""
+        if self.message_callback:
+            category = "error" if is_error else "system"
+            self.message_callback(category, f"[{self.robot_name}] {message}")
+
+
+class AsyncCellMonitor:
+    """Holds sessions and subscriptions to many controllers in a single event loop"""
+
+    def __init__(self, data_callback, message_callback=None, publishing_interval=500):
+        self.data_callback = data_callback
+        self.message_callback = message_callback
+        self.publishing_interval = publishing_interval
+        self.connectors = {}  # robot name -> AsyncABBOPCUAConnector
+
+    def add_robot(self, robot_name, endpoint_url, node_ids):
+        """Register a controller to monitor"""
+        connector = AsyncABBOPCUAConnector(robot_name, endpoint_url, node_ids, self.data_callback,
+                                           self.message_callback, self.publishing_interval)
+        self.connectors[robot_name] = connector
+        return connector
+
+    async def start(self):
+        """Connect and subscribe to all robots concurrently"""
+        results = await asyncio.gather(*(self._start_one(c) for c in self.connectors.values()))
+        return dict(zip(self.connectors, results))
+
+    async def _start_one(self, connector):
+        if not await connector.connect():
+            return False
+        return await connector.start_monitoring()
+
+    async def stop(self):
+        """Unsubscribe and disconnect every robot"""
+        await asyncio.gather(*(c.disconnect() for c in self.connectors.values()))
+
+    async def run_for(self, seconds):
+        """Monitor the whole cell for a fixed time, then shut down"""
+        try:
+            await self.start()
+            await asyncio.sleep(seconds)
+        finally:
+            await self.stop()
@@ -1,6 +1,13 @@
+import collections
+import functools
+import itertools
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+
+from gateway_nodes import GVL_STATION_NODE_IDS
+from subscription_profiles import get_profile, make_monitored_item
+from notification_log import NotificationRecorder
 
 try:
     from opcua import Client
@@ -10,48 +17,152 @@ except ImportError:
     Client = None
 
 
+POSITION_AXES = ('x', 'y', 'z')
+DEFAULT_MERGE_WINDOW = 0.05  # seconds of source time within which axis updates form one sample
+
+
+def source_timestamp(data):
+    """Server source timestamp of a notification as epoch seconds, falling back to local time"""
+    try:
+        source = data.monitored_item.Value.SourceTimestamp
+    except AttributeError:
+        source = None
+    if source is None:
+        return time.time()
+    if source.tzinfo is None:
+        source = source.replace(tzinfo=timezone.utc)  # OPC UA timestamps are UTC
+    return source.timestamp()
+
+
+class PositionSampler:
+    """Merges single-axis position notifications into whole (timestamp, x, y, z) samples.
+
+    The gateway publishes each axis as its own item, so one move arrives as up to three
+    notifications. Updates whose source timestamps lie within merge_window of the sample being
+    built belong to it; the sample goes to the sinks once every axis is in, when an update falls
+    outside the window, or merge_window seconds after it was started. That last case is handled by
+    the next update or, when none comes, by one flush thread started with the first sample.
+    """
+
+    def __init__(self, sinks=(), merge_window=DEFAULT_MERGE_WINDOW):
+        self.sinks = list(sinks)  # callables taking (timestamp, x, y, z)
+        self.merge_window = merge_window
+        self.position = [0.0, 0.0, 0.0]
+        self.sample_time = None  # source timestamp of the sample being built
+        self.sample_axes = set()
+        self.deadline = None  # monotonic time the sample being built is emitted incomplete
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.pending = threading.Condition(self.lock)  # wakes the flush thread when a sample starts
+        self._flusher = None
+
+    def reset(self, x, y, z):
+        """Start from a known position, e.g. one read when monitoring starts"""
+        with self.lock:
+            self.position = [x, y, z]
+            self.sample_time = None
+            self.deadline = None
+            self.sample_axes.clear()
+
+    def update(self, axis, value, timestamp=None):
+        """Merge a new value of axis ('x', 'y' or 'z') with its source timestamp"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if self.sample_time is not None and (
+                    axis in self.sample_axes or abs(timestamp - self.sample_time) > self.merge_window
+                    or time.monotonic() >= self.deadline):
+                self._emit()
+            started = self.sample_time is None
+            if started:
+                self.sample_time = timestamp
+                self.deadline = time.monotonic() + self.merge_window
+            self.position[POSITION_AXES.index(axis)] = value
+            self.sample_axes.add(axis)
+            if len(self.sample_axes) == len(POSITION_AXES):
+                self._emit()
+            elif self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_expired, name="position-sampler",
+                                                 daemon=True)
+                self._flusher.start()
+            elif started:
+                self.pending.notify()
+
+    def _flush_expired(self):
+        """Emit samples that are still incomplete merge_window seconds after they were started"""
+        with self.lock:
+            while True:
+                if self.sample_time is None:
+                    self.pending.wait()
+                    continue
+                remaining = self.deadline - time.monotonic()
+                if remaining > 0:
+                    self.pending.wait(remaining)
+                else:
+                    self._emit()
+
+    def _emit(self):
+        """Pass the sample being built to the sinks; call with self.lock held so samples stay ordered"""
+        sample = (self.sample_time,) + tuple(self.position)
+        self.sample_time = None
+        self.deadline = None
+        self.sample_axes.clear()
+        self.samples += 1
+        for sink in self.sinks:
+            try:
+                sink(*sample)
+            except Exception as e:
+                print(f"Position sample handling error: {e}")
+
+
+class MonitoredSignal:
+    """A monitored node with its value decoder, message emitter and subscription profile pre-bound.
+
+    A timed signal's emitter also gets the notification's source timestamp.
+    """
+
+    __slots__ = ('name', 'decode', 'emit', 'profile', 'timed')
+
+    def __init__(self, name, decode, emit, profile="normal", timed=False):
+        self.name = name
+        self.decode = decode
+        self.emit = emit
+        self.profile = profile
+        self.timed = timed
+
+
 class ABBOPCUAConnector:
-    def __init__(self, message_callback):
+    def __init__(self, message_callback, position_deadband=1.0, position_sampling_interval=100):
         self.message_callback = message_callback
         self.client = None
         self.is_connected = False
         self.is_monitoring = False
-        self.subscription = None
-        self.handles = {}
+        self.subscriptions = {}  # profile name -> Subscription
+        self.handles = {}  # server monitored item id -> node name
+        self.signals = {}  # client handle -> MonitoredSignal, filled on subscribe
+        self.client_handles = itertools.count(1)  # unique across all subscriptions
+        self.recorder = None  # NotificationRecorder while recording
+        self.telemetry = None  # TelemetryStore that keeps every position sample
+        self.position_sampler = PositionSampler([self._on_position_sample])
+        self.position_buffer = None  # kinematics.PositionRingBuffer for live motion analysis
+        self.nodes = {}  # node name -> resolved Node, filled once at connect
+        self.read_times = collections.deque(maxlen=100)  # bulk read durations in ms
+
+        # Position monitoring: server-side absolute deadband (mm) and sampling interval (ms)
+        self.position_deadband = position_deadband
+        self.position_sampling_interval = position_sampling_interval
+        self.current_position = None
+        self.last_reported_position = None
+        self.client_side_deadband = False  # used only if the server rejects the filter
 
         # ABB Robot OPC UA Node IDs (standard addresses)
-        self.node_ids = {
-            # Robot Status
-            'robot_ready': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotReady',
-            'robot_busy': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotBusy',
-            'robot_error': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.RobotError',
-
-            # Current Position
-            'current_x': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosX',
-            'current_y': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosY',
-            'current_z': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ActualPosZ',
-
-            # Target Position
-            'target_x': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosX',
-            'target_y': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosY',
-            'target_z': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.TargetPosZ',
-
-            # Movement Status
-            'movement_type': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.MovementType',
-            'movement_speed': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.Speed',
-
-            # Program Control
-            'current_program': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.CurrentProgram',
-            'program_running': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ProgramRunning',
-
-            # Digital Outputs (Gripper, Tools)
-            'gripper_status': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.GripperOpen',
-            'tool_status': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.ToolActive',
-
-            # Safety
-            'emergency_stop': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.EmergencyStop',
-            'safety_gates': 'ns=4;s=|var|CPX-E-CEC-M1-APPL.Application.GVL_Station.SafetyGateClosed'
-        }
+        self.node_ids = dict(GVL_STATION_NODE_IDS)
+
+        # Node groups fetched together in a single Read request
+        self.position_nodes = ['current_x', 'current_y', 'current_z']
+        self.status_nodes = [
+            'robot_ready', 'robot_busy', 'robot_error',
+            'program_running', 'current_program', 'emergency_stop'
+        ]
 
         # Movement type mappings
         self.movement_types = {
@@ -62,6 +173,69 @@ class ABBOPCUAConnector:
             4: "Absolute Move"
         }
 
+        # Signal registry: node name -> pre-bound decoder/emitter
+        self.signal_table = self._build_signal_table()
+
+    def _build_signal_table(self):
+        """Bind a decoder and emitter to every signal we monitor"""
+        table = {}
+        for name, category, signal_type, profile in [
+            ('robot_busy', "status", "robot_busy", "normal"),
+            ('robot_ready', "status", "robot_ready", "normal"),
+            ('robot_error', "error", "robot_error", "low_latency"),
+            ('program_running', "program", "program_started", "normal"),
+            ('emergency_stop', "safety", "emergency_stop", "low_latency"),
+        ]:
+            table[name] = MonitoredSignal(name, bool, functools.partial(self._emit_flag, category, signal_type),
+                                          profile)
+
+        table['movement_type'] = MonitoredSignal('movement_type', int, self._emit_movement_type)
+        table['gripper_status'] = MonitoredSignal('gripper_status', bool, self._emit_gripper)
+
+        for name in self.position_nodes:
+            table[name] = MonitoredSignal(name, float, functools.partial(self._handle_position_change, name),
+                                          timed=True)
+        return table
+
+    def register_signal(self, name, decode, emit, node_id=None, profile="normal"):
+        """Add a signal to monitor; takes effect on the next start_monitoring"""
+        if node_id:
+            self.node_ids[name] = node_id
+        if self.is_connected and name in self.node_ids:
+            self.nodes[name] = self.client.get_node(self.node_ids[name])
+        get_profile(profile)
+        self.signal_table[name] = MonitoredSignal(name, decode, emit, profile)
+
+    def set_signal_profile(self, name, profile):
+        """Move a signal to another subscription profile; takes effect on the next start_monitoring"""
+        get_profile(profile)
+        self.signal_table[name].profile = profile
+
+    def start_recording(self, path):
+        """Record every notification to a binary log for offline replay"""
+        self.stop_recording()
+        self.recorder = NotificationRecorder(path)
+
+    def stop_recording(self):
+        """Stop recording and close the log"""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+
+    def replay_handles(self):
+        """Index every registered signal under a local handle so a recorded log can be replayed offline.
+
+        Returns the node id -> client handle map to pass to NotificationReplayer.
+        """
+        self.signals = {}
+        handles = {}
+        for handle, name in enumerate(self.signal_table, 1):
+            self.signals[handle] = self.signal_table[name]
+            handles[self.node_ids[name]] = handle
+        self.current_position = {'x': 0.0, 'y': 0.0, 'z': 0.0, 'timestamp': datetime.now().isoformat()}
+        self.last_reported_position = dict(self.current_position)
+        return handles
+
     def connect(self, endpoint_url="opc.tcp://desktop-j8ae1eh:61510/ABB.IoTGateway"):
         """Connect to ABB Robot OPC UA server"""
         if Client is None:
@@ -74,8 +248,8 @@ class ABBOPCUAConnector:
             self.client.set_password("password")
             self.client.connect()
 
-            # Get root node
-            root = self.client.get_root_node()
+            # Resolve all node IDs once so later reads skip get_node
+            self._resolve_nodes()
             self.message_callback("system", f"Connected to OPC UA server: {endpoint_url}")
 
             self.is_connected = True
@@ -89,7 +263,9 @@ class ABBOPCUAConnector:
         """Disconnect from OPC UA server"""
         if self.client:
             self.stop_monitoring()
+            self.stop_recording()
             self.client.disconnect()
+            self.nodes = {}
             self.is_connected = False
             self.message_callback("system", "Disconnected from OPC UA server")
 
@@ -100,34 +276,22 @@ class ABBOPCUAConnector:
             return False
 
         try:
-            # Create subscription
-            self.subscription = self.client.create_subscription(500, self)  # 500ms update interval
+            # Seed the position so single-axis notifications can be merged into it
+            self.current_position = self._read_current_position()
+            self.last_reported_position = dict(self.current_position)
+            self.position_sampler.reset(self.current_position['x'], self.current_position['y'],
+                                        self.current_position['z'])
 
             # Subscribe to important nodes
-            nodes_to_monitor = [
-                'robot_busy', 'robot_ready', 'robot_error',
-                'movement_type', 'movement_speed',
-                'program_running', 'current_program',
-                'gripper_status', 'tool_status',
-                'emergency_stop'
-            ]
-
-            for node_name in nodes_to_monitor:
-                node_id = self.node_ids.get(node_name)
-                if node_id:
-                    try:
-                        node = self.client.get_node(node_id)
-                        handle = self.subscription.subscribe_data_change(node)
-                        self.handles[handle] = node_name
-                    except Exception as e:
-                        self.message_callback("warning", f"Could not subscribe to {node_name}: {e}")
+            nodes_to_monitor = [name for name in self.signal_table if name not in self.position_nodes]
+            for node_name, status in self._subscribe_signals(nodes_to_monitor):
+                self.message_callback("warning", f"Could not subscribe to {node_name}: {status}")
+
+            self._subscribe_positions()
 
             self.is_monitoring = True
             self.message_callback("system", "Started real-time OPC UA monitoring")
 
-            # Start position polling thread
-            threading.Thread(target=self._poll_positions, daemon=True).start()
-
             return True
 
         except Exception as e:
@@ -136,102 +300,182 @@ class ABBOPCUAConnector:
 
     def stop_monitoring(self):
         """Stop monitoring robot data"""
-        if self.subscription:
-            self.subscription.delete()
-            self.subscription = None
+        for subscription in self.subscriptions.values():
+            subscription.delete()
+        self.subscriptions = {}
+        self.handles = {}
+        self.signals = {}
         self.is_monitoring = False
         self.message_callback("system", "Stopped OPC UA monitoring")
 
     def datachange_notification(self, node, val, data):
         """Callback for OPC UA data changes"""
-        try:
-            node_id = str(node.nodeid)
-            node_name = self._get_node_name_from_id(node_id)
-
-            if node_name:
-                self._handle_data_change(node_name, val)
+        if self.recorder is not None:
+            self.recorder.record(node, val)
+        signal = self.signals.get(data.monitored_item.ClientHandle)
+        if signal is None:
+            return
 
+        try:
+            value = signal.decode(val) if val is not None else None
+            if signal.timed:
+                signal.emit(value, source_timestamp(data))
+            else:
+                signal.emit(value)
         except Exception as e:
-            self.message_callback("error", f"Data change handling error: {e}")
-
-    def _get_node_name_from_id(self, node_id):
-        """Get node name from node ID"""
-        for name, nid in self.node_ids.items():
-            if nid in node_id:
-                return name
-        return None
+            self.message_callback("error", f"Data change handling error ({signal.name}): {e}")
+
+    def _emit_flag(self, category, signal_type, value):
+        """Report a boolean signal when it becomes active"""
+        if value:
+            self.message_callback(category, {"type": signal_type, "value": True})
+
+    def _emit_movement_type(self, value):
+        """Report the current movement type with its readable name"""
+        movement_name = self.movement_types.get(value, "Unknown")
+        self.message_callback("movement", {"type": "movement_type", "value": value, "name": movement_name})
+
+    def _emit_gripper(self, value):
+        """Report gripper open/close"""
+        action = "opened" if value else "closed"
+        self.message_callback("tool", {"type": "gripper", "action": action, "value": value})
+
+    def _subscription_for(self, profile_name):
+        """Get or create the subscription that publishes at the profile's interval"""
+        if profile_name not in self.subscriptions:
+            profile = get_profile(profile_name)
+            self.subscriptions[profile_name] = self.client.create_subscription(profile["publishing_interval"], self)
+        return self.subscriptions[profile_name]
+
+    def _subscribe_signals(self, names, sampling_interval=None, mfilter=None):
+        """Create monitored items per profile in one request each and index them by client handle"""
+        by_profile = collections.OrderedDict()
+        for name in names:
+            if name in self.nodes:
+                by_profile.setdefault(self.signal_table[name].profile, []).append(name)
+
+        rejected = []
+        for profile_name, group in by_profile.items():
+            profile = get_profile(profile_name)
+            subscription = self._subscription_for(profile_name)
+            requests = [make_monitored_item(next(self.client_handles), self.nodes[name].nodeid, profile,
+                                            sampling_interval, mfilter) for name in group]
+
+            # Register first so notifications arriving before the response already resolve
+            for name, request in zip(group, requests):
+                self.signals[request.RequestedParameters.ClientHandle] = self.signal_table[name]
+
+            for name, request, result in zip(group, requests, subscription.create_monitored_items(requests)):
+                if isinstance(result, ua.StatusCode):
+                    del self.signals[request.RequestedParameters.ClientHandle]
+                    rejected.append((name, result))
+                else:
+                    self.handles[result] = name
+        return rejected
+
+    def _subscribe_positions(self):
+        """Monitor X/Y/Z with an absolute deadband so only real moves are pushed"""
+        deadband = ua.DataChangeFilter()
+        deadband.Trigger = ua.DataChangeTrigger.StatusValue
+        deadband.DeadbandType = ua.DeadbandType.Absolute
+        deadband.DeadbandValue = float(self.position_deadband)
+
+        rejected = [name for name, _ in
+                    self._subscribe_signals(self.position_nodes, self.position_sampling_interval, deadband)]
+
+        if rejected:
+            # Server does not support deadband filters - fall back to plain items
+            self.message_callback("warning", f"Deadband filter rejected for {', '.join(rejected)}, "
+                                             f"filtering positions on the client")
+            self.client_side_deadband = True
+            for name, status in self._subscribe_signals(rejected, self.position_sampling_interval):
+                self.message_callback("warning", f"Could not subscribe to {name}: {status}")
+
+    def _handle_position_change(self, node_name, value, timestamp=None):
+        """Merge a single-axis update into the current position and report it"""
+        if self.current_position is None or value is None:
+            return
+
+        axis = node_name[-1]  # current_x -> x
+        if self.current_position[axis] == value:
+            return  # initial notification repeats the seeded value
+        self.current_position[axis] = value
+        self.current_position['timestamp'] = datetime.now().isoformat()
+        self.position_sampler.update(axis, value, timestamp)
+
+        if self.client_side_deadband and not self._position_changed(
+                self.last_reported_position, self.current_position, self.position_deadband):
+            return
+
+        self.last_reported_position = dict(self.current_position)
+        self.message_callback("position", dict(self.current_position))
+
+    def _on_position_sample(self, timestamp, x, y, z):
+        """Keep a merged position sample"""
+        if self.telemetry is not None:
+            self.telemetry.record_position(x, y, z, timestamp)
+        if self.position_buffer is not None:
+            self.position_buffer.append(timestamp, x, y, z)
 
-    def _handle_data_change(self, node_name, value):
-        """Handle specific data changes"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-
-        if node_name == 'robot_busy' and value:
-            self.message_callback("status", {"type": "robot_busy", "value": True})
-
-        elif node_name == 'robot_ready' and value:
-            self.message_callback("status", {"type": "robot_ready", "value": True})
-
-        elif node_name == 'robot_error' and value:
-            self.message_callback("error", {"type": "robot_error", "value": True})
-
-        elif node_name == 'movement_type':
-            movement_name = self.movement_types.get(value, "Unknown")
-            self.message_callback("movement", {"type": "movement_type", "value": value, "name": movement_name})
-
-        elif node_name == 'program_running' and value:
-            self.message_callback("program", {"type": "program_started", "value": True})
-
-        elif node_name == 'gripper_status':
-            action = "opened" if value else "closed"
-            self.message_callback("tool", {"type": "gripper", "action": action, "value": value})
-
-        elif node_name == 'emergency_stop' and value:
-            self.message_callback("safety", {"type": "emergency_stop", "value": True})
-
-    def _poll_positions(self):
-        """Poll position data continuously"""
-        last_position = None
-
-        while self.is_monitoring and self.is_connected:
-            try:
-                current_pos = self._read_current_position()
+    def _read_current_position(self):
+        """Read current robot position in a single round-trip"""
+        values = self._read_nodes(self.position_nodes)
+        return self._position_from_values(values)
+
+    def _position_from_values(self, values):
+        """Build a position dict from bulk-read values"""
+        return {
+            'x': values.get('current_x') or 0.0,
+            'y': values.get('current_y') or 0.0,
+            'z': values.get('current_z') or 0.0,
+            'timestamp': datetime.now().isoformat()
+        }
 
-                # Check if position changed significantly
-                if last_position and self._position_changed(last_position, current_pos):
-                    self.message_callback("position", current_pos)
+    def _resolve_nodes(self):
+        """Resolve every configured node ID to a Node object"""
+        self.nodes = {name: self.client.get_node(node_id) for name, node_id in self.node_ids.items()}
 
-                last_position = current_pos
-                time.sleep(0.5)  # Poll every 500ms
+    def _read_nodes(self, node_names):
+        """Read the Value attribute of several nodes with one OPC UA Read request"""
+        values = dict.fromkeys(node_names)
+        names = [name for name in node_names if name in self.nodes]
+        if not names:
+            return values
 
-            except Exception as e:
-                self.message_callback("error", f"Position polling error: {e}")
-                time.sleep(2)
+        params = ua.ReadParameters()
+        for name in names:
+            rv = ua.ReadValueId()
+            rv.NodeId = self.nodes[name].nodeid
+            rv.AttributeId = ua.AttributeIds.Value
+            params.NodesToRead.append(rv)
 
-    def _read_current_position(self):
-        """Read current robot position"""
         try:
-            x = self._read_node('current_x')
-            y = self._read_node('current_y')
-            z = self._read_node('current_z')
-
-            return {
-                'x': x or 0.0,
-                'y': y or 0.0,
-                'z': z or 0.0,
-                'timestamp': datetime.now().isoformat()
-            }
-        except:
-            return {'x': 0.0, 'y': 0.0, 'z': 0.0}
+            start = time.perf_counter()
+            results = self.client.uaclient.read(params)
+            self.read_times.append((time.perf_counter() - start) * 1000.0)
+        except Exception:
+            return values
+
+        for name, result in zip(names, results):
+            if result.StatusCode.is_good():
+                values[name] = result.Value.Value
+        return values
 
     def _read_node(self, node_name):
         """Read value from specific node"""
-        try:
-            node_id = self.node_ids.get(node_name)
-            if node_id:
-                node = self.client.get_node(node_id)
-                return node.get_value()
-        except:
+        return self._read_nodes([node_name]).get(node_name)
+
+    def get_read_stats(self):
+        """Get timing of recent bulk reads in milliseconds"""
+        if not self.read_times:
             return None
+        times = list(self.read_times)
+        return {
+            'count': len(times),
+            'last_ms': times[-1],
+            'avg_ms': sum(times) / len(times),
+            'max_ms': max(times)
+        }
 
     def _position_changed(self, pos1, pos2, threshold=1.0):
         """Check if position changed significantly"""
@@ -247,15 +491,18 @@ class ABBOPCUAConnector:
             return None
 
         try:
+            # Status flags and position come back from one Read request
+            values = self._read_nodes(self.status_nodes + self.position_nodes)
             status = {
                 'connected': self.is_connected,
-                'ready': self._read_node('robot_ready'),
-                'busy': self._read_node('robot_busy'),
-                'error': self._read_node('robot_error'),
-                'program_running': self._read_node('program_running'),
-                'current_program': self._read_node('current_program'),
-                'emergency_stop': self._read_node('emergency_stop'),
-                'position': self._read_current_position(),
+                'ready': values['robot_ready'],
+                'busy': values['robot_busy'],
+                'error': values['robot_error'],
+                'program_running': values['program_running'],
+                'current_program': values['current_program'],
+                'emergency_stop': values['emergency_stop'],
+                'position': self._position_from_values(values),
+                'read_stats': self.get_read_stats(),
                 'timestamp': datetime.now().isoformat()
             }
             return status
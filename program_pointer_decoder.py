@@ -0,0 +1,206 @@
+import operator
+import re
+
+try:
+    from opcua import ua
+    from opcua.ua import utils
+except ImportError:
+    ua = None
+    utils = None
+
+from tracing import tracer, DEBUG, ERROR
+
+LINE_PATTERN = re.compile(r'Line[=:]\s*(\d+)')
+MODULE_PATTERN = re.compile(r'Module[=:]\s*([^,\s]+)')
+ROUTINE_PATTERN = re.compile(r'Routine[=:]\s*([^,\s]+)')
+
+
+class ProgramPointerDecodeError(ValueError):
+    """Raised when a ProgramPointer notification can't be decoded"""
+
+
+class ProgramPointerDecoder:
+    """Decodes ProgramPointer notifications into (line, module, routine).
+
+    The payload layout is detected on the first notification of a session and a specialised
+    decoder is bound for it; the introspecting slow path only runs again if that decoder fails.
+    """
+
+    def __init__(self, log=None):
+        self.log = log or (lambda message, is_error=False: None)
+        self.fast_decode = None
+        self.fast_hits = 0
+        self.slow_hits = 0
+
+    def reset(self):
+        """Forget the bound layout, e.g. when a new session starts"""
+        self.fast_decode = None
+
+    def decode(self, val):
+        """Decode a notification value; line is None if the payload carries none"""
+        if self.fast_decode is not None:
+            try:
+                line, module, routine = self.fast_decode(val)
+                if type(line) is not int:
+                    line = int(line)
+                self.fast_hits += 1
+                return line, module, routine
+            except Exception:
+                self.fast_decode = None
+
+        result = self.decode_slow(val)
+        self.slow_hits += 1
+        if result[0] is not None:
+            self.fast_decode = bind_fast_decoder(val)
+        return result
+
+    def decode_slow(self, val):
+        """Discover the payload shape by introspection"""
+        debug = tracer.level >= DEBUG
+        if debug:
+            tracer.trace(DEBUG, "decoder", "Raw data received: %s (%s)", val, type(val))
+
+        # Process the raw data
+        data_source = None
+        if ua is not None and isinstance(val, ua.ExtensionObject):
+            # Attempt to decode the ExtensionObject
+            try:
+                if hasattr(val, "Body") and val.Body is not None:
+                    data_source = val.Body
+                    self.log(f"Decoded ExtensionObject Body: {data_source}")
+                else:
+                    decoded = utils.unpack_extension_object(val)
+                    data_source = decoded
+                    self.log(f"Unpacked ExtensionObject: {decoded}")
+            except Exception as e:
+                tracer.trace(ERROR, "decoder", "ExtensionObject unpack error: %s", e)
+                raise ProgramPointerDecodeError(f"Failed to unpack ExtensionObject: {e}")
+        elif hasattr(val, "Value"):
+            data_source = val.Value
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Value attribute: %s", data_source)
+        else:
+            data_source = val
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Direct value: %s", data_source)
+
+        current_point = None
+        module_name = "---"
+        routine_name = "---"
+
+        # Extract program pointer data - try different attribute access patterns
+        if hasattr(data_source, "Line"):
+            current_point = data_source.Line
+            module_name = getattr(data_source, "Module", "N/A")
+            routine_name = getattr(data_source, "Routine", "N/A")
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Attribute access - Line: %s, Module: %s, Routine: %s",
+                             current_point, module_name, routine_name)
+        elif hasattr(data_source, "line"):
+            current_point = data_source.line
+            module_name = getattr(data_source, "module", "N/A")
+            routine_name = getattr(data_source, "routine", "N/A")
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Lowercase attribute access - Line: %s, Module: %s, Routine: %s",
+                             current_point, module_name, routine_name)
+        elif isinstance(data_source, dict):
+            current_point = data_source.get("Line") or data_source.get("line")
+            module_name = data_source.get("Module", data_source.get("module", "N/A"))
+            routine_name = data_source.get("Routine", data_source.get("routine", "N/A"))
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Dict access - Line: %s, Module: %s, Routine: %s",
+                             current_point, module_name, routine_name)
+        else:
+            # Try to inspect the object's attributes
+            try:
+                attrs = dir(data_source)
+                if debug:
+                    tracer.trace(DEBUG, "decoder", "Available attributes: %s", attrs)
+                # Look for common attribute patterns
+                for attr in attrs:
+                    if 'line' in attr.lower():
+                        current_point = getattr(data_source, attr, None)
+                    if 'module' in attr.lower():
+                        module_name = getattr(data_source, attr, "N/A")
+                    if 'routine' in attr.lower():
+                        routine_name = getattr(data_source, attr, "N/A")
+                if debug:
+                    tracer.trace(DEBUG, "decoder", "Found by name - Line: %s, Module: %s, Routine: %s",
+                                 current_point, module_name, routine_name)
+            except Exception as e:
+                tracer.trace(ERROR, "decoder", "Error inspecting object: %s", e)
+
+        # Convert to integer if necessary
+        if current_point is not None and not isinstance(current_point, int):
+            try:
+                current_point = int(current_point)
+            except Exception:
+                tracer.trace(ERROR, "decoder", "Line conversion failed: %s", current_point)
+                raise ProgramPointerDecodeError(f"Line number not convertible: {current_point}")
+
+        # If we still don't have data, try string parsing
+        if current_point is None and data_source is not None:
+            data_str = str(data_source)
+            if debug:
+                tracer.trace(DEBUG, "decoder", "Trying string parsing: %s", data_str)
+            # Try to extract information from string representation
+            if "Line" in data_str or "Module" in data_str or "Routine" in data_str:
+                # Simple string parsing as fallback
+                line_match = LINE_PATTERN.search(data_str)
+                module_match = MODULE_PATTERN.search(data_str)
+                routine_match = ROUTINE_PATTERN.search(data_str)
+
+                if line_match:
+                    current_point = int(line_match.group(1))
+                if module_match:
+                    module_name = module_match.group(1)
+                if routine_match:
+                    routine_name = routine_match.group(1)
+
+                if debug:
+                    tracer.trace(DEBUG, "decoder", "String parsed - Line: %s, Module: %s, Routine: %s",
+                                 current_point, module_name, routine_name)
+
+        return current_point, module_name, routine_name
+
+
+def bind_fast_decoder(val):
+    """Build a decoder specialised for the layout of val, or None if only the slow path can handle it"""
+    if ua is not None and isinstance(val, ua.ExtensionObject):
+        # Only a body that is already a structure can be read directly; raw bytes need unpacking
+        if getattr(val, "Body", None) is None:
+            return None
+        return _bind_nested("Body", val.Body)
+    if hasattr(val, "Value"):
+        return _bind_nested("Value", val.Value)
+    return _bind_fields(val)
+
+
+def _bind_nested(attr, data_source):
+    get_fields = _bind_fields(data_source)
+    if get_fields is None:
+        return None
+    get_source = operator.attrgetter(attr)
+    return lambda v: get_fields(get_source(v))
+
+
+def _bind_fields(data_source):
+    """Pick attribute or key access for line/module/routine on this payload type"""
+    for line, module, routine in (("Line", "Module", "Routine"), ("line", "module", "routine")):
+        if hasattr(data_source, line):
+            if hasattr(data_source, module) and hasattr(data_source, routine):
+                return operator.attrgetter(line, module, routine)
+            return _attr_fields_with_default(line, module, routine)
+
+    if isinstance(data_source, dict):
+        return _dict_fields
+    return None
+
+
+def _attr_fields_with_default(line, module, routine):
+    return lambda v: (getattr(v, line), getattr(v, module, "N/A"), getattr(v, routine, "N/A"))
+
+
+def _dict_fields(v):
+    return (v.get("Line") or v.get("line"), v.get("Module", v.get("module", "N/A")),
+            v.get("Routine", v.get("routine", "N/A")))
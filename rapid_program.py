@@ -0,0 +1,659 @@
+"""Parser for the RAPID programs the monitor narrates, and the message tables generated from them.
+
+Understands the subset the cell programs use - MODULE/PROC/WHILE/TEST/CASE blocks and the MoveL,
+MoveJ, Offs, SetDO, WaitTime, TPReadFK, TPWrite and TPErase instructions - and builds the per-line
+actions, the CASE-based pick/place movement groups and the silent lines from the source, keyed
+by the line numbers the controller reports in ProgramPointer. The result is cached on disk by
+file hash, so loading an unchanged program skips the parse.
+
+    python rapid_program.py Rapid_code_sample.txt
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Rapid_code_sample.txt")
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rapid_cache")
+DEFAULT_WATCH_INTERVAL = 1.0
+FORMAT_VERSION = 1  # part of the cache key; bump when the generated tables change
+
+MOVE_INSTRUCTIONS = {"movel", "movej"}
+DEFAULT_WORK_OBJECT = "wobj0"
+
+# Blocks inside a routine: opening keyword -> closing keyword
+BLOCKS = {"while": "endwhile", "test": "endtest", "if": "endif", "for": "endfor"}
+CLOSERS = {closer: opener for opener, closer in BLOCKS.items()}
+
+
+class RapidParseError(Exception):
+    """The source is not RAPID this parser can follow"""
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class Statement:
+    """One instruction or block keyword, at the line the program pointer reports for it"""
+
+    __slots__ = ("line", "name", "args", "switches", "routine")
+
+    def __init__(self, line, name, args, switches, routine):
+        self.line = line
+        self.name = name  # lower case instruction or keyword
+        self.args = args
+        self.switches = switches  # optional arguments, e.g. {"wobj": "pickupbay"}
+        self.routine = routine
+
+    def __repr__(self):
+        return f"Statement({self.line}, {self.name!r}, {self.args!r})"
+
+
+class Case:
+    __slots__ = ("line", "values", "body")
+
+    def __init__(self, line, values):
+        self.line = line
+        self.values = values
+        self.body = []
+
+
+class Block:
+    """A WHILE/TEST/IF/FOR block; TEST bodies are split into cases"""
+
+    __slots__ = ("kind", "line", "end_line", "expression", "body", "cases")
+
+    def __init__(self, kind, line, expression):
+        self.kind = kind
+        self.line = line
+        self.end_line = None
+        self.expression = expression
+        self.body = []  # Statements and nested Blocks, in source order
+        self.cases = []
+
+
+class Routine:
+    __slots__ = ("name", "line", "end_line", "body")
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.end_line = None
+        self.body = []
+
+
+class RapidProgram:
+    """Parsed module: routines and their statement trees"""
+
+    def __init__(self, module, routines, statements):
+        self.module = module
+        self.routines = routines  # name -> Routine, in source order
+        self.statements = statements  # line -> Statement
+
+    @property
+    def entry(self):
+        """Routine the program starts in: main if there is one, else the first"""
+        if "main" in self.routines:
+            return self.routines["main"]
+        return next(iter(self.routines.values()), None)
+
+
+def parse(source):
+    """Parse RAPID source text into a RapidProgram"""
+    module = None
+    routines = {}
+    statements = {}
+    stack = []  # open Routine/Block objects, innermost last
+    pending = None  # (line, text) of an instruction continued on following lines
+
+    number = 0
+    try:
+        for number, raw in enumerate(source.splitlines(), start=1):
+            text = _strip_comment(raw).strip()
+            if pending:
+                text = pending[1] + " " + text
+                number_for_statement = pending[0]
+                pending = None
+            else:
+                number_for_statement = number
+            if not text:
+                continue
+
+            keyword = text.split(None, 1)[0].rstrip(":").lower()
+            rest = text[len(keyword):].strip()
+
+            if keyword == "module":
+                if module is not None:
+                    raise RapidParseError(number, "only one MODULE per file is supported")
+                module = rest.split("(")[0].strip()
+                stack.append(("module", number))
+                continue
+            if keyword in ("proc", "trap", "func"):
+                if not rest.split("(")[0].split():
+                    raise RapidParseError(number, f"{keyword.upper()} without a name")
+                name = rest.split("(")[0].split()[-1]
+                routine = Routine(name, number)
+                routines[name] = routine
+                stack.append(routine)
+                continue
+            if keyword in ("endmodule", "endproc", "endtrap", "endfunc"):
+                if not stack:
+                    raise RapidParseError(number, f"{keyword.upper()} without an open block")
+                closed = stack.pop()
+                if isinstance(closed, Block):
+                    raise RapidParseError(number, f"{keyword.upper()} inside an open {closed.kind.upper()}")
+                if isinstance(closed, Routine):
+                    closed.end_line = number
+                continue
+
+            routine = next((item for item in reversed(stack) if isinstance(item, Routine)), None)
+            if routine is None:
+                # Data declarations and anything else outside a routine
+                if not text.endswith(";") and keyword in ("const", "pers", "var", "task", "local"):
+                    pending = (number_for_statement, text)
+                continue
+
+            if keyword in BLOCKS:
+                statement = Statement(number, keyword, [rest.rsplit(" DO", 1)[0].rsplit(" THEN", 1)[0].strip()], {},
+                                      routine.name)
+                statements[number] = statement
+                block = Block(keyword, number, statement.args[0])
+                _append(stack, block)
+                stack.append(block)
+                continue
+            if keyword in CLOSERS:
+                block = stack.pop() if stack else None
+                if not isinstance(block, Block) or block.kind != CLOSERS[keyword]:
+                    raise RapidParseError(number, f"{keyword.upper()} does not close an open {CLOSERS[keyword].upper()}")
+                block.end_line = number
+                statements[number] = Statement(number, keyword, [], {}, routine.name)
+                continue
+            if keyword in ("case", "default"):
+                block = stack[-1] if stack else None
+                if not isinstance(block, Block) or block.kind != "test":
+                    raise RapidParseError(number, f"{keyword.upper()} outside TEST")
+                values = [value.strip() for value in rest.rstrip(":").split(",") if value.strip()]
+                block.cases.append(Case(number, values if keyword == "case" else ["DEFAULT"]))
+                statements[number] = Statement(number, keyword, values, {}, routine.name)
+                continue
+            if keyword in ("else", "elseif"):
+                statements[number] = Statement(number, keyword, [rest], {}, routine.name)
+                continue
+
+            if not text.endswith(";"):
+                pending = (number_for_statement, text)
+                continue
+            if not re.match(r"\s*\w", text):
+                raise RapidParseError(number_for_statement, f"expected an instruction, got {text!r}")
+            name, args, switches = _split_instruction(text[:-1])
+            statement = Statement(number_for_statement, name.lower(), args, switches, routine.name)
+            statements[statement.line] = statement
+            _append(stack, statement)
+    except RapidParseError:
+        raise
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+        # Anything the checks above did not anticipate still names the offending line
+        raise RapidParseError(number, f"cannot parse {raw.strip()!r}: {e}") from e
+
+    if stack:
+        raise RapidParseError(len(source.splitlines()), "unclosed block at end of file")
+    return RapidProgram(module, routines, statements)
+
+
+def _append(stack, item):
+    """Add a statement or block to the innermost open body, or the current CASE of a TEST"""
+    parent = stack[-1]
+    if isinstance(parent, Block) and parent.kind == "test":
+        if not parent.cases:
+            raise RapidParseError(item.line, "instruction in TEST before the first CASE")
+        parent.cases[-1].body.append(item)
+    elif isinstance(parent, (Block, Routine)):
+        parent.body.append(item)
+
+
+def _strip_comment(text):
+    """Drop a ! comment, leaving ! inside strings alone"""
+    in_string = False
+    for i, char in enumerate(text):
+        if char == '"':
+            in_string = not in_string
+        elif char == "!" and not in_string:
+            return text[:i]
+    return text
+
+
+def _split_top_level(text, separator=","):
+    """Split on separator outside brackets and strings"""
+    parts, depth, in_string, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _split_instruction(text):
+    """'MoveL p20,v100,fine,tool\\WObj:=bay' -> ('MoveL', ['p20', 'v100', 'fine', 'tool'], {'wobj': 'bay'})"""
+    match = re.match(r"\s*(\w+)\s*(.*)$", text, re.S)
+    name, rest = match.group(1), match.group(2)
+    args, switches = [], {}
+    for part in _split_top_level(rest):
+        pieces = _split_top_level(part, "\\")
+        if part.startswith("\\"):
+            pieces = [""] + pieces
+        if pieces[0]:
+            args.append(pieces[0])
+        for switch in pieces[1:]:
+            key, _, value = switch.partition(":=")
+            switches[key.strip().lower()] = value.strip()
+    return name, args, switches
+
+
+def _string(arg):
+    return arg[1:-1] if len(arg) >= 2 and arg[0] == arg[-1] == '"' else arg
+
+
+def _number(arg):
+    try:
+        return float(arg)
+    except ValueError:
+        return None
+
+
+def _move_target(statement):
+    """(base target, (dx, dy, dz) or None) of a move instruction"""
+    target = statement.args[0] if statement.args else "?"
+    match = re.match(r"offs\s*\((.*)\)$", target, re.I)
+    if not match:
+        return target, None
+    parts = _split_top_level(match.group(1))
+    offset = tuple(_number(value) or 0.0 for value in parts[1:4])
+    return parts[0], offset + (0.0,) * (3 - len(offset))
+
+
+def _is_vacuum(signal):
+    return "valve" in signal.lower() or "vac" in signal.lower()
+
+
+def _sentence(phrases):
+    """['a', 'b', 'c'] -> 'a, b, and c'"""
+    if len(phrases) <= 2:
+        return " and ".join(phrases)
+    return ", ".join(phrases[:-1]) + ", and " + phrases[-1]
+
+
+class ProgramTables:
+    """Message tables generated from one program, in the shapes main.py publishes"""
+
+    def __init__(self, module, routine, actions, movement_groups, group_messages, silent_lines, cycles,
+                 source_hash=None):
+        self.module = module
+        self.routine = routine
+        self.actions = actions  # line -> {level: message}
+        self.movement_groups = movement_groups  # group name -> [lines]
+        self.group_messages = group_messages  # group name -> {level: message}
+        self.silent_lines = silent_lines  # set of lines
+        self.cycles = cycles  # one loop iteration per CASE choice, as program pointer lines
+        self.source_hash = source_hash
+
+    @property
+    def cycle_start(self):
+        """First line of the main loop, where every pick/place cycle begins"""
+        return self.cycles[0][0] if self.cycles else None
+
+    @property
+    def cycle_end(self):
+        return self.cycles[0][-1] if self.cycles else None
+
+    def to_dict(self):
+        return {"format": FORMAT_VERSION, "source_hash": self.source_hash, "module": self.module,
+                "routine": self.routine,
+                "actions": {str(line): messages for line, messages in self.actions.items()},
+                "movement_groups": self.movement_groups, "group_messages": self.group_messages,
+                "silent_lines": sorted(self.silent_lines), "cycles": self.cycles}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["module"], data["routine"],
+                   {int(line): messages for line, messages in data["actions"].items()},
+                   data["movement_groups"], data["group_messages"], set(data["silent_lines"]),
+                   data["cycles"], data.get("source_hash"))
+
+
+def build_tables(program):
+    """Generate the message tables for a parsed program"""
+    entry = program.entry
+    home = None
+    for statement in _walk(entry.body if entry else []):
+        if statement.name in MOVE_INSTRUCTIONS:
+            home = _move_target(statement)[0]
+            break
+
+    actions, silent_lines = {}, set()
+    for line, statement in program.statements.items():
+        messages = _line_messages(statement, home)
+        if messages:
+            actions[line] = messages
+        else:
+            silent_lines.add(line)
+
+    movement_groups, group_messages = {}, {}
+    choices = {statement.args[0]: [_string(arg) for arg in statement.args[2:]]
+               for statement in program.statements.values() if statement.name == "tpreadfk" and statement.args}
+    for block in _blocks(entry.body if entry else [], "test"):
+        for case in block.cases:
+            lines = [item.line for item in case.body]
+            if not lines:
+                continue
+            shape = _case_label(case, choices.get(block.expression))
+            phase = _case_phase(case)
+            name = f"{shape}_{phase}"
+            while name in movement_groups:
+                name += "_"
+            movement_groups[name] = lines
+            group_messages[name] = _group_messages(shape, phase, case.body)
+
+    final_moves = _trailing_moves(entry)
+    if len(final_moves) >= 2:
+        first, last = _move_target(final_moves[0])[0], _move_target(final_moves[-1])[0]
+        movement_groups["final_movements"] = [statement.line for statement in final_moves]
+        group_messages["final_movements"] = {
+            "level1": f"Executing final position movements through {first} to {last}",
+            "level2": f"Final movement sequence: positions {first}-{last}",
+            "level3": "Final moves",
+        }
+
+    return ProgramTables(program.module, entry.name if entry else None, actions, movement_groups,
+                         group_messages, silent_lines, _cycles(entry))
+
+
+def _walk(body):
+    """Statements of a body in source order, descending into blocks and cases"""
+    for item in body:
+        if isinstance(item, Block):
+            yield from _walk(item.body)
+            for case in item.cases:
+                yield from _walk(case.body)
+        else:
+            yield item
+
+
+def _blocks(body, kind):
+    for item in body:
+        if isinstance(item, Block):
+            if item.kind == kind:
+                yield item
+            yield from _blocks(item.body, kind)
+            for case in item.cases:
+                yield from _blocks(case.body, kind)
+
+
+def _line_messages(statement, home):
+    """Per-level messages for one statement, or None for lines that should stay silent"""
+    name, args = statement.name, statement.args
+    if name in MOVE_INSTRUCTIONS:
+        target, offset = _move_target(statement)
+        work_object = statement.switches.get("wobj", DEFAULT_WORK_OBJECT)
+        where = "" if work_object == DEFAULT_WORK_OBJECT else f" on {work_object}"
+        if offset is None:
+            if target == home:
+                return {"level1": f"Moving to home position {target}", "level2": f"Moving to home position {target}",
+                        "level3": f"Move to {target}"}
+            return {"level1": f"Moving to position {target}{where}", "level2": f"Moving to position {target}",
+                    "level3": f"Move to {target}"}
+        dz = offset[2]
+        if dz < 0:
+            return {"level1": f"Moving down {-dz:g} mm from {target}{where}", "level2": f"Moving down {-dz:g} mm",
+                    "level3": "Move down"}
+        if dz > 0:
+            return {"level1": f"Moving up {dz:g} mm from {target}{where}", "level2": f"Moving up {dz:g} mm",
+                    "level3": "Move up"}
+        return {"level1": f"Moving to offset position from {target}{where}",
+                "level2": f"Moving to offset from {target}", "level3": f"Move near {target}"}
+    if name == "setdo" and len(args) >= 2:
+        signal, value = args[0], args[1]
+        if _is_vacuum(signal):
+            if value == "1":
+                return {"level1": "Activating vacuum to grip the part", "level2": "Vacuum on",
+                        "level3": "Vacuum on"}
+            return {"level1": "Releasing vacuum to drop the part", "level2": "Vacuum off", "level3": "Vacuum off"}
+        return {"level1": f"Setting output {signal} to {value}", "level2": f"Output {signal} = {value}",
+                "level3": f"{signal} = {value}"}
+    if name == "waittime" and args:
+        return {"level1": f"Waiting {args[0]} seconds", "level2": f"Waiting {args[0]} s", "level3": "Wait"}
+    if name == "tpreadfk" and len(args) >= 2:
+        choices = [_string(arg) for arg in args[2:] if _string(arg)]
+        return {"level1": f"Waiting for operator input on teach pendant: {_string(args[1])}",
+                "level2": f"Teach pendant input required ({', '.join(choices)})" if choices
+                else "Teach pendant input required",
+                "level3": "Select on pendant"}
+    if name == "tpwrite" and args:
+        text = _string(args[0])
+        return {"level1": f"Teach pendant shows: {text}", "level2": text, "level3": "Pendant message"}
+    # Flow control, TPErase and instructions without a description stay quiet
+    return None
+
+
+def _case_label(case, choices):
+    """Shape name for a CASE, from the TPReadFK function key labels when the TEST reads that register"""
+    value = case.values[0] if case.values else "DEFAULT"
+    index = _number(value)
+    if choices and index is not None and 1 <= index <= len(choices) and index == int(index):
+        return re.sub(r"\W+", "_", choices[int(index) - 1].strip().lower())
+    return "default" if value == "DEFAULT" else f"case{value}"
+
+
+def _case_phase(case):
+    """pickup if the case switches the vacuum on, place if it switches it off"""
+    for statement in _walk(case.body):
+        if statement.name == "setdo" and len(statement.args) >= 2 and _is_vacuum(statement.args[0]):
+            return "pickup" if statement.args[1] == "1" else "place"
+    return "sequence"
+
+
+def _group_messages(shape, phase, body):
+    """Consolidated messages describing what a CASE does"""
+    long_steps, short_steps = [], []
+    lowered = set()
+
+    def add(long, short):
+        if not long_steps or long_steps[-1] != long:
+            long_steps.append(long)
+            short_steps.append(short)
+
+    for statement in _walk(body):
+        if statement.name in MOVE_INSTRUCTIONS:
+            target, offset = _move_target(statement)
+            if offset is not None and offset[2] < 0:
+                lowered.add(target)
+                add("moving down", "approach")
+            elif offset is None and target in lowered:
+                add("returning to safe height", "safe return")
+        elif statement.name == "setdo" and len(statement.args) >= 2 and _is_vacuum(statement.args[0]):
+            if statement.args[1] == "1":
+                add("activating vacuum", "vacuum on")
+            else:
+                add("releasing vacuum", "vacuum off")
+
+    label = shape.replace("_", " ")
+    action = "placing" if phase == "place" else phase
+    if long_steps:
+        level1 = f"Executing {label} {action} sequence - {_sentence(long_steps)}"
+        level2 = f"{label.capitalize()} {phase}: {', '.join(short_steps)}"
+    else:
+        level1 = f"Executing {label} {action} sequence"
+        level2 = f"{label.capitalize()} {phase}"
+    return {"level1": level1, "level2": level2, "level3": f"{label.capitalize()} {phase}"}
+
+
+def _trailing_moves(entry):
+    """Consecutive moves after the last block of the entry routine"""
+    if entry is None:
+        return []
+    moves = []
+    for item in entry.body:
+        if isinstance(item, Block):
+            moves = []
+        elif item.name in MOVE_INSTRUCTIONS:
+            moves.append(item)
+    return moves
+
+
+def _cycles(entry):
+    """Program pointer lines for one iteration of the entry routine's main loop, one list per CASE choice"""
+    loop = next(_blocks(entry.body, "while"), None) if entry else None
+    if loop is None:
+        return []
+    tests = list(_blocks(loop.body, "test"))
+    choices = max((len(test.cases) for test in tests), default=1)
+    return [_lines(loop.body, choice) for choice in range(choices)]
+
+
+def _lines(body, choice):
+    lines = []
+    for item in body:
+        if isinstance(item, Block):
+            lines.append(item.line)
+            if item.kind == "test":
+                if item.cases:
+                    case = item.cases[min(choice, len(item.cases) - 1)]
+                    lines.append(case.line)
+                    lines.extend(_lines(case.body, choice))
+            else:
+                lines.extend(_lines(item.body, choice))
+        else:
+            lines.append(item.line)
+    return lines
+
+
+def source_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_program(path=DEFAULT_PROGRAM_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    """Message tables for a RAPID file, from the cache when the file is unchanged"""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = source_hash(data)
+    cache_path = os.path.join(cache_dir, f"{digest[:32]}_v{FORMAT_VERSION}.json")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return ProgramTables.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("RAPID cache %s unusable, re-parsing: %s", cache_path, e)
+
+    tables = build_tables(parse(data.decode("utf-8", errors="replace")))
+    tables.source_hash = digest
+    _store(cache_path, tables)
+    return tables
+
+
+def _store(cache_path, tables):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tables.to_dict(), f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write RAPID cache %s: %s", cache_path, e)
+
+
+class ProgramWatcher:
+    """Polls a RAPID file and hands freshly built tables to on_change whenever its content changes.
+
+    A change is only picked up once the file has stopped changing for one interval, so an editor
+    that saves in several writes is read once. If the new source does not parse, the current
+    tables stay in place until the next save.
+    """
+
+    def __init__(self, path, on_change, interval=DEFAULT_WATCH_INTERVAL, cache_dir=DEFAULT_CACHE_DIR):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.cache_dir = cache_dir
+        self.source_hash = None  # hash of the source the current tables came from
+        self.reloads = 0
+        self._stat = self._read_stat()
+        self._settling = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, tables=None):
+        """Start polling; tables is what is already published, so an unchanged file is not reloaded"""
+        if tables is not None:
+            self.source_hash = tables.source_hash
+        self._thread = threading.Thread(target=self._run, name="program-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _read_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                # A bad reload or a failing on_change must not end hot reload for the rest of the session
+                logger.exception("Program watcher poll of %s failed", self.path)
+
+    def poll(self):
+        """Check the file once; returns True if new tables were handed over"""
+        stat = self._read_stat()
+        if stat != self._stat:
+            self._stat = stat
+            self._settling = True
+            return False
+        if not self._settling or stat is None:
+            return False
+        self._settling = False
+
+        try:
+            tables = load_program(self.path, self.cache_dir)
+        except (OSError, RapidParseError) as e:
+            logger.warning("Keeping current message tables, could not reload %s: %s", self.path, e)
+            return False
+        if tables.source_hash == self.source_hash:
+            return False  # touched or saved without changes
+        self.source_hash = tables.source_hash
+        self.reloads += 1
+        self.on_change(tables)
+        return True
+
+
+if __name__ == "__main__":
+    tables = load_program(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROGRAM_PATH)
+    print(f"MODULE {tables.module}, PROC {tables.routine}")
+    for line, messages in sorted(tables.actions.items()):
+        print(f"{line:5} {messages['level1']}")
+    for name, lines in tables.movement_groups.items():
+        print(f"{name:>20} {lines}: {tables.group_messages[name]['level1']}")
+    print(f"silent: {sorted(tables.silent_lines)}")
+    for cycle in tables.cycles:
+        print(f"cycle: {cycle}")
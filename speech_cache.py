@@ -0,0 +1,162 @@
+"""On-disk cache of pre-synthesised speech clips for the fixed phrase catalogue.
+
+Clips are keyed by voice, rate and text, so changing either renders a fresh set. The cache is
+bounded by total size and evicts the least recently played clips first.
+
+    python speech_cache.py build          # render every catalogue phrase for the configured voice
+    python speech_cache.py info
+"""
+import collections
+import hashlib
+import os
+import sys
+import threading
+import wave
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+try:
+    import simpleaudio
+except ImportError:
+    simpleaudio = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_cache")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+CLIP_EXTENSION = ".wav"
+
+
+def can_play():
+    """True if there is a way to play cached clips on this machine"""
+    return winsound is not None or simpleaudio is not None
+
+
+def play_clip(path, stop_event=None):
+    """Play a clip on the calling thread until it ends or stop_event is set"""
+    stop_event = stop_event or threading.Event()
+    if winsound is not None:
+        with wave.open(path, "rb") as clip:
+            duration = clip.getnframes() / float(clip.getframerate())
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        if stop_event.wait(duration):
+            winsound.PlaySound(None, 0)
+    elif simpleaudio is not None:
+        playing = simpleaudio.WaveObject.from_wave_file(path).play()
+        while playing.is_playing():
+            if stop_event.wait(0.02):
+                playing.stop()
+                break
+    else:
+        raise RuntimeError("No audio player available. Install with: pip install simpleaudio")
+
+
+def stop_playback():
+    if winsound is not None:
+        winsound.PlaySound(None, 0)
+    elif simpleaudio is not None:
+        simpleaudio.stop_all()
+
+
+class SpeechCache:
+    """Maps (voice, rate, text) to a rendered clip on disk, least recently used first"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()  # key -> clip size in bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # lookups on the speech thread, rendering on another
+        self._scan()
+
+    def _scan(self):
+        """Index clips already on disk, oldest access first"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        clips = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CLIP_EXTENSION):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                clips.append((stat.st_mtime, name[:-len(CLIP_EXTENSION)], stat.st_size))
+        for _, key, size in sorted(clips):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(text, voice, rate):
+        return hashlib.sha256(f"{voice}\0{rate}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + CLIP_EXTENSION)
+
+    def lookup(self, text, voice, rate):
+        """Path of the clip for this text, or None if it has not been rendered"""
+        key = self.key(text, voice, rate)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))  # keeps LRU order across restarts
+        except OSError:
+            pass
+        return self.path(key)
+
+    def render(self, engine, phrases, voice, rate):
+        """Synthesise the phrases not cached yet with a pyttsx3 engine; returns how many were added"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pending = {}
+        for text in phrases:
+            key = self.key(text, voice, rate)
+            if text and key not in self.entries and key not in pending:
+                pending[key] = text
+                engine.save_to_file(text, self.path(key) + ".tmp")
+        if not pending:
+            return 0
+        engine.runAndWait()  # renders the whole batch
+
+        added = 0
+        for key in pending:
+            tmp_path = self.path(key) + ".tmp"
+            if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+                os.replace(tmp_path, self.path(key))
+                self._add(key, os.path.getsize(self.path(key)))
+                added += 1
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+        return added
+
+    def _add(self, key, size):
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            with self.lock:
+                key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def get_stats(self):
+        return {'clips': len(self.entries), 'bytes': self.total_bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("build", "info"):
+        print(__doc__)
+        sys.exit(1)
+    if sys.argv[1] == "build":
+        from main import start_services
+        print(f"Rendered {start_services().build_audio_cache()} new clips")
+    stats = SpeechCache().get_stats()
+    print(f"{stats['clips']} clips, {stats['bytes'] / 1024 / 1024:.1f} MB in {DEFAULT_CACHE_DIR}")
@@ -0,0 +1,59 @@
+try:
+    from opcua import ua
+except ImportError:
+    ua = None
+
+# Named subscription tuning profiles. A subscription has one publishing interval, so signals
+# are grouped into one subscription per profile; the rest applies per monitored item.
+SUBSCRIPTION_PROFILES = {
+    # Fast-changing signals where every change matters (program pointer, safety)
+    "low_latency": {
+        "publishing_interval": 50,  # ms
+        "sampling_interval": 50,  # ms
+        "queue_size": 20,  # changes buffered between publishes instead of coalesced
+        "discard_oldest": True
+    },
+    # Regular status signals
+    "normal": {
+        "publishing_interval": 500,
+        "sampling_interval": 250,
+        "queue_size": 1,
+        "discard_oldest": True
+    },
+    # Slow signals where only the latest value is interesting
+    "economy": {
+        "publishing_interval": 2000,
+        "sampling_interval": 1000,
+        "queue_size": 1,
+        "discard_oldest": True
+    }
+}
+
+
+def get_profile(name):
+    """Look up a subscription profile by name"""
+    try:
+        return SUBSCRIPTION_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown subscription profile '{name}', "
+                         f"expected one of {', '.join(SUBSCRIPTION_PROFILES)}")
+
+
+def make_monitored_item(client_handle, nodeid, profile, sampling_interval=None, mfilter=None):
+    """Build a MonitoredItemCreateRequest using the sampling, queue and discard settings of a profile"""
+    item = ua.ReadValueId()
+    item.NodeId = nodeid
+    item.AttributeId = ua.AttributeIds.Value
+
+    params = ua.MonitoringParameters()
+    params.ClientHandle = client_handle
+    params.SamplingInterval = sampling_interval if sampling_interval is not None else profile["sampling_interval"]
+    params.QueueSize = profile["queue_size"]
+    params.DiscardOldest = profile["discard_oldest"]
+    params.Filter = mfilter
+
+    request = ua.MonitoredItemCreateRequest()
+    request.ItemToMonitor = item
+    request.MonitoringMode = ua.MonitoringMode.Reporting
+    request.RequestedParameters = params
+    return request
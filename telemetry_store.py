@@ -0,0 +1,355 @@
+"""Append-only columnar store for robot positions and program pointer updates.
+
+Every row holds the full robot state at one instant - timestamp, x, y, z, line, module id and
+routine id - with the values that did not change carried over from the previous row. Each column
+is a fixed-width array in its own memory-mapped file, preallocated per segment, so appending is
+a slice assignment per batch and reading back is a plain NumPy view:
+
+    telemetry/
+        names.json                   module and routine names, index = id (0 is unknown)
+        segment_000001/
+            meta.json                rows written, first/last timestamp
+            timestamp.f8  x.f4  y.f4  z.f4  line.i4  module.u2  routine.u2
+
+Segments rotate when full or too old, and the oldest are deleted to stay within the retention
+limits. Callers only queue rows; a writer thread does the disk work.
+
+    python telemetry_store.py info
+    python telemetry_store.py dump --last 60
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy not installed. Install with: pip install numpy")
+    np = None
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry")
+DEFAULT_SEGMENT_ROWS = 1 << 20  # about 28 MB per segment
+DEFAULT_SEGMENT_SECONDS = 3600.0
+DEFAULT_MAX_BYTES = 1 << 30
+DEFAULT_BATCH_ROWS = 256
+DEFAULT_FLUSH_SECONDS = 1.0
+
+# Column name -> NumPy dtype; the dtype code doubles as the file extension
+COLUMNS = {
+    "timestamp": "<f8",
+    "x": "<f4",
+    "y": "<f4",
+    "z": "<f4",
+    "line": "<i4",
+    "module": "<u2",
+    "routine": "<u2",
+}
+COLUMN_NAMES = tuple(COLUMNS)
+NO_LINE = -1
+
+
+def _column_path(segment_dir, name):
+    return os.path.join(segment_dir, f"{name}.{COLUMNS[name][1:]}")
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The telemetry store needs NumPy. Install with: pip install numpy")
+
+
+class TelemetryStore:
+    """Writer for one store directory; safe to call from several threads.
+
+    record_position and record_pointer only build a row and queue it in batches; writing,
+    segment rotation and retention run on a background thread.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, segment_rows=DEFAULT_SEGMENT_ROWS,
+                 segment_seconds=DEFAULT_SEGMENT_SECONDS, max_bytes=DEFAULT_MAX_BYTES, max_segments=None,
+                 max_age=None, batch_rows=DEFAULT_BATCH_ROWS, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        _require_numpy()
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.segment_seconds = segment_seconds
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self.max_age = max_age  # seconds of history to keep, None keeps everything within the size limits
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        names = _read_json(os.path.join(directory, "names.json"), {})
+        self.module_names = names.get("modules") or [""]
+        self.routine_names = names.get("routines") or [""]
+        self.module_ids = {name: i for i, name in enumerate(self.module_names)}
+        self.routine_ids = {name: i for i, name in enumerate(self.routine_names)}
+
+        # Last known state, carried into every row
+        self.position = (0.0, 0.0, 0.0)
+        self.pointer = (NO_LINE, 0, 0)
+        # Continue after the newest row already on disk so timestamps stay ordered across restarts
+        existing = list_segments(directory)
+        newest = _read_json(os.path.join(existing[-1], "meta.json"), {}) if existing else {}
+        self.last_timestamp = newest.get("end") or 0.0
+
+        self.pending = []  # rows not yet handed to the writer
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+        # Owned by the writer thread
+        self.segment = None  # (directory, {column: memmap}, meta)
+        self.rows_written = 0
+        self.batches = queue.Queue()  # lists of rows, threading.Event to confirm, or None to stop
+        self.writer = threading.Thread(target=self._write_loop, name="telemetry", daemon=True)
+        self.writer.start()
+
+    # Writing
+
+    def record_position(self, x, y, z, timestamp=None):
+        with self.lock:
+            if self.closed:
+                return
+            self.position = (x, y, z)
+            self._append(timestamp)
+
+    def record_pointer(self, line, module=None, routine=None, timestamp=None):
+        with self.lock:
+            if self.closed:
+                return
+            module_id = self._name_id(module, self.module_names, self.module_ids)
+            routine_id = self._name_id(routine, self.routine_names, self.routine_ids)
+            self.pointer = (NO_LINE if line is None else line, module_id, routine_id)
+            self._append(timestamp)
+
+    def _append(self, timestamp):
+        timestamp = time.time() if timestamp is None else timestamp
+        # Keep timestamps non-decreasing so range queries can binary search
+        timestamp = self.last_timestamp = max(timestamp, self.last_timestamp)
+        self.pending.append((timestamp,) + self.position + self.pointer)
+        if len(self.pending) >= self.batch_rows or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self._hand_off()
+
+    def _hand_off(self):
+        """Pass the pending rows to the writer; call with self.lock held"""
+        self.last_flush = time.monotonic()
+        if self.pending:
+            self.batches.put(self.pending)
+            self.pending = []
+
+    def _name_id(self, name, names, ids):
+        if not name:
+            return 0
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(names)
+            names.append(name)
+            _write_json(os.path.join(self.directory, "names.json"),
+                        {"modules": self.module_names, "routines": self.routine_names})
+        return name_id
+
+    def flush(self):
+        """Write every row recorded so far and wait until it is on disk"""
+        written = threading.Event()
+        with self.lock:
+            if self.closed:
+                return
+            self._hand_off()
+            self.batches.put(written)
+        written.wait()
+
+    def _write_loop(self):
+        while True:
+            try:
+                item = self.batches.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                # Nothing recorded for a while; write what the last rows left pending
+                with self.lock:
+                    if time.monotonic() - self.last_flush >= self.flush_seconds:
+                        self._hand_off()
+                continue
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._write(item)
+            except Exception as e:
+                print(f"Telemetry write failed, {len(item)} rows lost: {e}")
+        self._close_segment()
+
+    def _write(self, rows):
+        """Write rows column by column, rotating segments as they fill"""
+        columns = list(zip(*rows))
+        start = 0
+        while start < len(rows):
+            if self.segment is None or self._segment_full(rows[start][0]):
+                self._rotate(rows[start][0])
+                self._apply_retention(rows[-1][0])
+            segment_dir, arrays, meta = self.segment
+            offset = meta["rows"]
+            count = min(len(rows) - start, self.segment_rows - offset)
+            for name, values in zip(COLUMN_NAMES, columns):
+                arrays[name][offset:offset + count] = values[start:start + count]
+            meta["rows"] = offset + count
+            meta["end"] = rows[start + count - 1][0]
+            start += count
+            self.rows_written += count
+            _write_json(os.path.join(segment_dir, "meta.json"), meta)
+
+    def _segment_full(self, timestamp):
+        meta = self.segment[2]
+        return meta["rows"] >= self.segment_rows or (
+            meta["start"] is not None and timestamp - meta["start"] >= self.segment_seconds)
+
+    def _rotate(self, timestamp):
+        """Close the current segment and preallocate the next one"""
+        self._close_segment()
+        existing = list_segments(self.directory)
+        number = int(os.path.basename(existing[-1]).split("_")[1]) + 1 if existing else 1
+        segment_dir = os.path.join(self.directory, f"segment_{number:06d}")
+        os.makedirs(segment_dir)
+        arrays = {name: np.memmap(_column_path(segment_dir, name), dtype=dtype, mode="w+",
+                                  shape=(self.segment_rows,))
+                  for name, dtype in COLUMNS.items()}
+        meta = {"rows": 0, "capacity": self.segment_rows, "start": timestamp, "end": timestamp}
+        _write_json(os.path.join(segment_dir, "meta.json"), meta)
+        self.segment = (segment_dir, arrays, meta)
+
+    def _close_segment(self):
+        if self.segment is None:
+            return
+        for array in self.segment[1].values():
+            array.flush()
+        self.segment = None
+
+    def _apply_retention(self, now):
+        """Delete the oldest closed segments beyond the size, count or age limits"""
+        segments = list_segments(self.directory)
+        current = self.segment[0] if self.segment else None
+        closed = [segment for segment in segments if segment != current]
+        segment_bytes = self.segment_rows * sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+        while closed:
+            too_many = self.max_segments is not None and len(closed) + 1 > self.max_segments
+            too_big = self.max_bytes is not None and (len(closed) + 1) * segment_bytes > self.max_bytes
+            meta = _read_json(os.path.join(closed[0], "meta.json"), {})
+            too_old = self.max_age is not None and meta.get("end") is not None and now - meta["end"] > self.max_age
+            if not (too_many or too_big or too_old):
+                break
+            shutil.rmtree(closed.pop(0), ignore_errors=True)
+
+    def close(self):
+        """Write everything recorded and stop the writer; later records are dropped"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._hand_off()
+            self.batches.put(None)
+        self.writer.join()
+
+    # Reading
+
+    def query(self, start=None, end=None, columns=COLUMN_NAMES):
+        """Rows with start <= timestamp < end, including rows not yet flushed"""
+        self.flush()
+        return read_range(self.directory, start, end, columns)
+
+
+def list_segments(directory):
+    """Segment directories, oldest first"""
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.startswith("segment_"))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_names(directory):
+    """(module names, routine names); the module and routine columns index into these"""
+    names = _read_json(os.path.join(directory, "names.json"), {})
+    return names.get("modules") or [""], names.get("routines") or [""]
+
+
+def read_segment(segment_dir, columns=COLUMN_NAMES):
+    """Read-only views of the written rows of one segment"""
+    _require_numpy()
+    meta = _read_json(os.path.join(segment_dir, "meta.json"))
+    if not meta or not meta.get("rows"):
+        return None, meta
+    arrays = {name: np.memmap(_column_path(segment_dir, name), dtype=COLUMNS[name], mode="r",
+                              shape=(meta["capacity"],))[:meta["rows"]]
+              for name in columns}
+    return arrays, meta
+
+
+def read_range(directory, start=None, end=None, columns=COLUMN_NAMES):
+    """Columns of every row with start <= timestamp < end across segments, as NumPy arrays"""
+    _require_numpy()
+    wanted = set(columns) | {"timestamp"}
+    parts = {name: [] for name in columns}
+    for segment_dir in list_segments(directory):
+        arrays, meta = read_segment(segment_dir, wanted)
+        if arrays is None:
+            continue
+        if (end is not None and meta["start"] >= end) or (start is not None and meta["end"] < start):
+            continue
+        timestamps = arrays["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        if first < last:
+            for name in columns:
+                parts[name].append(arrays[name][first:last])
+    return {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+            for name, chunks in parts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("info", "dump"))
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY)
+    parser.add_argument("--last", type=float, help="only the last N seconds")
+    args = parser.parse_args()
+    _require_numpy()
+
+    if args.command == "info":
+        total = 0
+        for segment_dir in list_segments(args.directory):
+            meta = _read_json(os.path.join(segment_dir, "meta.json"), {})
+            total += meta.get("rows", 0)
+            span = (meta.get("end") or 0) - (meta.get("start") or 0)
+            print(f"{os.path.basename(segment_dir)}: {meta.get('rows', 0)} rows over {span:.0f} s")
+        print(f"{total} rows in {args.directory}")
+        return
+
+    start = time.time() - args.last if args.last else None
+    data = read_range(args.directory, start)
+    modules, routines = read_names(args.directory)
+    for row in zip(*(data[name] for name in COLUMN_NAMES)):
+        timestamp, x, y, z, line, module, routine = row
+        stamp = time.strftime("%H:%M:%S", time.localtime(timestamp))
+        print(f"{stamp} {x:9.2f} {y:9.2f} {z:9.2f} {modules[module]}/{routines[routine]}:{line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Level-gated tracing for the notification and speech hot paths.
+
+Records go into an in-memory ring buffer instead of stdout and are only formatted when dumped.
+Call sites check the level before building any arguments, so a disabled tracer costs one
+integer comparison:
+
+    if tracer.level >= DEBUG:
+        tracer.trace(DEBUG, "decoder", "Raw data received: %r", val)
+
+Enable at startup with ABB_TRACE=debug (or info/error), size the buffer with ABB_TRACE_SIZE.
+"""
+import collections
+import os
+import threading
+import time
+
+OFF = 0
+ERROR = 1
+INFO = 2
+DEBUG = 3
+
+LEVEL_NAMES = {OFF: "off", ERROR: "error", INFO: "info", DEBUG: "debug"}
+DEFAULT_CAPACITY = 10000
+
+
+class Tracer:
+    """Keeps the most recent trace records; older ones fall off the end of the buffer"""
+
+    def __init__(self, level=OFF, capacity=DEFAULT_CAPACITY):
+        self.level = level
+        self.records = collections.deque(maxlen=capacity)
+
+    def enable(self, level=DEBUG, capacity=None):
+        if capacity is not None and capacity != self.records.maxlen:
+            self.records = collections.deque(self.records, maxlen=capacity)
+        self.level = level
+
+    def disable(self):
+        self.level = OFF
+
+    def trace(self, level, category, message, *args):
+        """Store a record; message is %-formatted with args only when dumped"""
+        if level <= self.level:
+            self.records.append((time.time(), threading.current_thread().name, level, category, message, args))
+
+    def clear(self):
+        self.records.clear()
+
+    def lines(self):
+        """Formatted records, oldest first"""
+        lines = []
+        for timestamp, thread, level, category, message, args in list(self.records):
+            try:
+                text = message % args if args else message
+            except Exception as e:
+                text = f"{message} {args!r} (format error: {e})"
+            stamp = time.strftime("%H:%M:%S", time.localtime(timestamp)) + f".{int(timestamp % 1 * 1000):03d}"
+            lines.append(f"{stamp} {LEVEL_NAMES[level]:<5} [{thread}] {category}: {text}")
+        return lines
+
+    def dump(self, path):
+        """Write the buffer to a file; returns the number of records written"""
+        lines = self.lines()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n" if lines else "")
+        return len(lines)
+
+
+def _from_environment():
+    names = {name: level for level, name in LEVEL_NAMES.items()}
+    level = names.get(os.environ.get("ABB_TRACE", "off").lower(), OFF)
+    try:
+        capacity = int(os.environ.get("ABB_TRACE_SIZE", DEFAULT_CAPACITY))
+    except ValueError:
+        capacity = DEFAULT_CAPACITY
+    return Tracer(level, capacity)
+
+
+# Shared by every module on the notification path
+tracer = _from_environment()
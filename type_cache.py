@@ -0,0 +1,150 @@
+import enum
+import hashlib
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+
+try:
+    from opcua import ua
+    from opcua.common.structures import StructGenerator
+except ImportError:
+    ua = None
+    StructGenerator = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "type_cache")
+
+CACHE_HEADER = """# Generated ABB type definitions for {endpoint}
+# Fingerprint: {fingerprint} - regenerated automatically when the server types change
+from datetime import datetime
+import uuid
+from enum import IntEnum
+
+from opcua import ua
+
+"""
+
+
+def load_type_definitions_cached(client, endpoint_url, cache_dir=DEFAULT_CACHE_DIR):
+    """Register the server's structure decoders, reusing generated code from disk when types are unchanged.
+
+    Returns True when the decoders came from the cache.
+    """
+    dictionaries = _dictionary_nodes(client)
+    fingerprint = _fingerprint(client, endpoint_url, dictionaries)
+    path = os.path.join(cache_dir, f"{_endpoint_key(endpoint_url)}_{fingerprint[:16]}.py")
+
+    if os.path.exists(path):
+        try:
+            load_cached_type_definitions(path)
+            return True
+        except Exception as e:
+            logger.warning("Type cache %s unusable, regenerating: %s", path, e)
+
+    source = _generate(client, endpoint_url, fingerprint, dictionaries)
+    _store(cache_dir, path, endpoint_url, source)
+    return False
+
+
+def _dictionary_nodes(client):
+    """Binary type dictionaries on the server, apart from the standard Opc.Ua one"""
+    return [client.get_node(desc.NodeId) for desc in client.nodes.opc_binary.get_children_descriptions()
+            if desc.BrowseName != ua.QualifiedName("Opc.Ua")]
+
+
+def _fingerprint(client, endpoint_url, dictionaries):
+    """Hash of the endpoint, namespace table and the version of every type dictionary"""
+    digest = hashlib.sha256(endpoint_url.encode("utf-8"))
+    digest.update(repr(client.get_namespace_array()).encode("utf-8"))
+    for node in dictionaries:
+        digest.update(node.nodeid.to_string().encode("utf-8"))
+        try:
+            version = node.get_child("0:DataTypeVersion").get_value()
+        except Exception:
+            version = None
+        if version:
+            digest.update(str(version).encode("utf-8"))
+        else:
+            # No version published - fall back to the dictionary content itself
+            digest.update(node.get_value())
+    return digest.hexdigest()
+
+
+def _generate(client, endpoint_url, fingerprint, dictionaries):
+    """Build the decoder classes from the server dictionaries, register them and return their source"""
+    env = _exec_env()
+    code = [CACHE_HEADER.format(endpoint=endpoint_url, fingerprint=fingerprint)]
+    registrations = []
+
+    for node in dictionaries:
+        generator = StructGenerator()
+        generator.make_model_from_string(node.get_value().decode("utf-8"))
+        generator.get_python_classes(env)
+        code.extend(element.get_code() for element in generator.model)
+
+        # Every child of the dictionary that has a description is a structure with an encoding id
+        for desc in node.get_children_descriptions():
+            refs = client.get_node(desc.NodeId).get_references(refs=ua.ObjectIds.HasDescription,
+                                                               direction=ua.BrowseDirection.Inverse)
+            if not refs:
+                continue
+            name = _class_name(desc.BrowseName.Name)
+            if name not in env:
+                logger.warning("%s is a child of the binary dictionary but not in its XML", name)
+                continue
+            ua.register_extension_object(name, refs[0].NodeId, env[name])
+            registrations.append(f"ua.register_extension_object('{name}', "
+                                 f"ua.NodeId.from_string('{refs[0].NodeId.to_string()}'), {name})\n")
+
+    _register_enums(env)
+    return "".join(code) + "\n\n" + "".join(registrations)
+
+
+def load_cached_type_definitions(path):
+    """Run a cached definition file, which defines and registers the decoder classes; needs no server"""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    env = _exec_env()
+    exec(compile(source, path, "exec"), env)
+    _register_enums(env)
+
+
+def _store(cache_dir, path, endpoint_url, source):
+    """Write the generated source and drop stale files for the same endpoint"""
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        prefix = _endpoint_key(endpoint_url) + "_"
+        for name in os.listdir(cache_dir):
+            if name.startswith(prefix) and os.path.join(cache_dir, name) != path:
+                os.remove(os.path.join(cache_dir, name))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write type cache %s: %s", path, e)
+
+
+def _exec_env():
+    return {"ua": ua, "datetime": datetime, "uuid": uuid, "IntEnum": enum.IntEnum}
+
+
+def _register_enums(env):
+    """Expose generated enums on ua, like opcua's load_type_definitions does"""
+    for name, value in env.items():
+        if isinstance(value, type) and issubclass(value, enum.Enum) and value is not enum.IntEnum:
+            setattr(ua, name, value)
+
+
+def _endpoint_key(endpoint_url):
+    return hashlib.sha256(endpoint_url.encode("utf-8")).hexdigest()[:12]
+
+
+def _class_name(name):
+    """Same name cleaning the opcua structure generator applies"""
+    name = re.sub(r'\W+', '_', name)
+    name = re.sub(r'^[0-9]+', r'_\g<0>', name)
+    return name